@@ -0,0 +1,144 @@
+import os
+import asyncio
+import argparse
+import numpy as np
+from loguru import logger
+
+from typing import Dict, List
+
+from crawler import Crawler, Endpoints, INTERVAL_MS, split_windows, gather_or_cancel
+from store import CandleStore, CANDLE_DTYPES, csv_filename, export_csv, sort_candle_columns
+
+
+def audit_open_time(open_time:np.ndarray, interval_ms:int) -> dict:
+    """
+    Open time 배열의 연속성 검사 (vectorized diff).
+    Output : {'rows' : 행 수,
+              'duplicates' : 중복된 행 수,
+              'out_of_order' : 이전 행보다 Open time이 작은 행 수,
+              'misaligned' : interval 격자에 맞지 않는 행 수,
+              'missing' : 누락된 캔들 수,
+              'gaps' : (N, 2) 누락 구간 [start, end) (ms)}
+    누락 구간은 첫 캔들 기준 interval 격자로 맞춤 (격자에 맞지 않는 행 사이의 구간도 빠진 격자 캔들만 포함, 빠진 캔들이 없으면 제외).
+    """
+    open_time = np.asarray(open_time, dtype=np.int64)
+    diffs = np.diff(open_time)
+    out_of_order = int(np.count_nonzero(diffs < 0))
+
+    # 누락 구간은 정렬 + 중복 제거된 시간 기준 (이미 정렬된 경우 정렬 생략)
+    if out_of_order:
+        open_time = np.sort(open_time, kind='stable')
+        diffs = np.diff(open_time)
+    unique = open_time[np.concatenate([[True], diffs != 0])[:len(open_time)]]
+    base = unique[0] if len(unique) else 0
+    gap_idx = np.flatnonzero(np.diff(unique) > interval_ms)
+    # [start, end) : 앞 캔들 다음 격자 ~ 뒤 캔들 이상의 첫 격자 (floor/ceil division)
+    starts = base + ((unique[gap_idx] - base) // interval_ms + 1) * interval_ms
+    ends = base - ((base - unique[gap_idx + 1]) // interval_ms) * interval_ms
+    missing = (ends - starts) // interval_ms
+    gaps = np.stack([starts, ends], axis=1)[missing > 0]
+    return {'rows': len(open_time),
+            'duplicates': len(open_time) - len(unique),
+            'out_of_order': out_of_order,
+            'misaligned': int(np.count_nonzero((unique - base) % interval_ms)),
+            'missing': int(missing[missing > 0].sum()),
+            'gaps': gaps}
+
+
+def is_clean(report:dict) -> bool:
+    return not (report['duplicates'] or report['out_of_order'] or report['misaligned'] or len(report['gaps']))
+
+
+def format_report(report:dict) -> str:
+    return (f"{report['symbol']} {report['interval']} | rows : {report['rows']}, missing : {report['missing']} "
+            f"({len(report['gaps'])} gaps), duplicates : {report['duplicates']}, out_of_order : {report['out_of_order']}, "
+            f"misaligned : {report['misaligned']}")
+
+
+class CandleAuditor:
+    """
+    CandleStore(Crawler의 save=True 저장 위치)에 저장된 캔들의 누락/중복/순서 오류를 검사하고, 누락 구간만 REST로 다시 받아 저장소를 수정.
+    crawler가 없으면 검사만 가능 (run(repair=False)), repair를 요청하면 ValueError.
+    csv_dir이 주어지면 수정한 series의 CSV export({csv_dir}/btc_1h.csv)가 있는 경우 수정된 저장소 내용으로 다시 export.
+
+    auditor = CandleAuditor(store, crawler)
+    reports = await auditor.run(repair=True)
+    """
+    def __init__(self, store:CandleStore, crawler:Crawler=None, url:str=Endpoints.BINANCE_FUTURES_CANDLESTICK_API.value, limit:int=1500,
+                 csv_dir:str=None) -> None:
+        self.store = store
+        self.crawler = crawler
+        self.url = url
+        self.limit = limit
+        self.csv_dir = csv_dir
+
+    def audit(self, symbol:str, interval:str) -> dict:
+        # Open time 컬럼만 memmap으로 읽어 검사
+        open_time = self.store.load(symbol, interval)['Open time']
+        report = audit_open_time(open_time, INTERVAL_MS[interval])
+        report.update(symbol=symbol, interval=interval)
+        return report
+
+    async def fetch_gap(self, symbol:str, interval:str, startTime:int, endTime:int) -> Dict[str, np.ndarray]:
+        # 누락 구간 [startTime, endTime)만 요청 (짧은 구간은 limit을 줄여 request weight 절약, split_windows는 limit >= 1 필요)
+        limit = int(max(1, min(self.limit, -((startTime - endTime) // INTERVAL_MS[interval]))))
+        windows = split_windows(startTime, endTime, interval, limit)
+        df = await self.crawler.get_coin_candle_windows(self.url, symbol, interval, windows, limit)
+        return {column: np.asarray(df[column], dtype=dtype) for column, dtype in CANDLE_DTYPES.items()}
+
+    async def repair(self, symbol:str, interval:str, report:dict=None) -> dict:
+        """
+        (1) 누락 구간을 동시에 재요청 -> (2) 기존 데이터와 합쳐 정렬/중복 제거 -> (3) 저장소 교체 후 재검사.
+        거래소에도 없는 구간(점검 등)은 재요청 후에도 gap으로 남음. 반환값 : 재검사 결과 + 'refetched'
+        """
+        if self.crawler is None:
+            raise ValueError("repair requires a crawler : CandleAuditor(store, crawler) 또는 run(repair=False)")
+        report = report if report is not None else self.audit(symbol, interval)
+        if is_clean(report):
+            return {**report, 'refetched': 0}
+
+        fetched = await gather_or_cancel(*[self.fetch_gap(symbol, interval, int(start), int(end)) for start, end in report['gaps']])
+        stored = self.store.load(symbol, interval, mmap=False)
+        merged = {column: np.concatenate([stored[column]] + [candles[column] for candles in fetched])
+                  for column in CANDLE_DTYPES}
+        self.store.write(symbol, interval, sort_candle_columns(merged))
+        # CSV export도 수정된 내용으로 교체 (이전 CSV로 convert_csv 해도 수정 내용이 되돌아가지 않도록)
+        csv_path = os.path.join(self.csv_dir, csv_filename(symbol, interval)) if self.csv_dir else None
+        if csv_path is not None and os.path.exists(csv_path):
+            export_csv(self.store, symbol, interval, csv_path)
+
+        repaired = self.audit(symbol, interval)
+        repaired['refetched'] = sum(len(candles['Open time']) for candles in fetched)
+        logger.info(f"REPAIRED | {format_report(repaired)}, refetched : {repaired['refetched']}")
+        return repaired
+
+    async def run(self, series:List[tuple]=None, repair:bool=True) -> List[dict]:
+        # 저장된 모든 (symbol, interval) 검사, repair=True면 문제 있는 series를 동시에 수정 (crawler 필요)
+        if repair and self.crawler is None:
+            raise ValueError("repair requires a crawler : CandleAuditor(store, crawler) 또는 run(repair=False)")
+        series = series if series is not None else self.store.series()
+        reports = [self.audit(symbol, interval) for symbol, interval in series]
+        if repair:
+            reports = await gather_or_cancel(*[self.repair(report['symbol'], report['interval'], report) for report in reports])
+        return reports
+
+
+async def main(root:str, repair:bool, csv_dir:str) -> None:
+    store = CandleStore(root)
+    crawler = Crawler(store=store) if repair else None
+    try:
+        reports = await CandleAuditor(store, crawler, csv_dir=csv_dir).run(repair=repair)
+    finally:
+        if crawler is not None:
+            await crawler.client.close()
+    for report in reports:
+        print(('OK    | ' if is_clean(report) else 'ISSUE | ') + format_report(report))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--root', default='./data/store')
+    parser.add_argument('--repair', action='store_true', help='누락 구간을 REST로 다시 받아 저장소 수정')
+    parser.add_argument('--csv-dir', default=None, help='수정한 series의 CSV export가 있는 디렉토리 (있으면 함께 갱신)')
+    args = parser.parse_args()
+    asyncio.run(main(args.root, args.repair, args.csv_dir))
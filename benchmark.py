@@ -0,0 +1,259 @@
+import os
+import sys
+import time
+import orjson
+import asyncio
+import argparse
+import platform
+import numpy as np
+import pandas as pd
+
+from typing import Dict, List
+
+from environment import Environment, Action
+from store import CandleStore, convert_csv, parse_csv_name
+from rollout import RolloutPool
+from simulator import simulate, NUMBA_AVAILABLE
+from crawler import Crawler, RestClient, split_windows
+from stub_server import StubKlineServer
+from metrics import Metrics
+
+# resource는 Unix 전용 : 없으면 메모리 high-water mark를 기록하지 않음
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+# baseline 비교 대상 지표 : {지표 이름 : 클수록 좋은지 여부}
+COMPARED_METRICS = {'steps_per_sec': True,
+                    'pages_per_sec': True,
+                    'replay_seconds': False,
+                    'parse_seconds_per_page': False,
+                    'read_csv': False,
+                    'store_load': False,
+                    'store_mmap': False,
+                    'max_rss_mb': False}
+
+
+def load_chart_data(path):
+    chart_data = pd.read_csv(path)
+    # 학습 feature가 없는 경우 : chart 정보 자체를 training data로 사용
+    training_data = chart_data.to_numpy(dtype=np.float32)
+    return chart_data, training_data
+
+
+# 단일 Environment의 random policy step 속도 측정 (steps/sec, best of repeat)
+# done(-80% 손실)과 무관하게 전체 데이터를 끝까지 진행.
+def bench_env_step(chart_data, training_data, initial_balance=10000, min_trading_budget=70, max_trading_budget=1000, seed=0, repeat=3):
+    rng = np.random.default_rng(seed)
+    env = Environment(chart_data, training_data, initial_balance, min_trading_budget, max_trading_budget)
+    actions = rng.integers(0, Environment.NUM_ACTIONS, size=len(chart_data))
+    policies = rng.random((len(chart_data), Environment.NUM_ACTIONS))
+
+    elapsed = []
+    for _ in range(repeat):
+        env.reset()
+        env.step()
+        num_steps = 0
+        start = time.perf_counter()
+        for action, policy in zip(actions[1:], policies[1:]):
+            env.step(action, policy)
+            num_steps += 1
+        elapsed.append(time.perf_counter() - start)
+    return {'steps': num_steps, 'seconds': min(elapsed), 'steps_per_sec': num_steps / min(elapsed)}
+
+
+# 일정 간격(trade_every bar)마다만 거래하는 sparse policy에서 HOLD 구간을 step_until로 건너뛸 때의 속도 (bar/sec, best of repeat)
+def bench_fast_forward(chart_data, training_data, initial_balance=10000, min_trading_budget=70, max_trading_budget=1000,
+                       trade_every=100, seed=0, repeat=3):
+    rng = np.random.default_rng(seed)
+    env = Environment(chart_data, training_data, initial_balance, min_trading_budget, max_trading_budget)
+    actions = rng.choice([Action.LONG, Action.SHORT], size=len(chart_data))
+    policies = rng.random((len(chart_data), Environment.NUM_ACTIONS))
+
+    elapsed = []
+    for _ in range(repeat):
+        env.reset()
+        env.step()
+        start = time.perf_counter()
+        for action, policy in zip(actions, policies):
+            if env.step(action, policy)[3] or env.step_until(n_steps=trade_every - 1)[3]:
+                break
+        elapsed.append(time.perf_counter() - start)
+    num_steps = env.idx - env.start_idx
+    return {'steps': num_steps, 'seconds': min(elapsed), 'steps_per_sec': num_steps / min(elapsed)}
+
+
+# 고정된 random (action, confidence) 시퀀스로 전체 기간을 simulate로 재생하는 시간 (numba 컴파일 시간 제외)
+def bench_replay(chart_data, initial_balance=10000, min_trading_budget=70, max_trading_budget=1000, seed=0, repeat=5):
+    rng = np.random.default_rng(seed)
+    prices = np.asarray(chart_data['Close'], dtype=np.float64)
+    actions = rng.integers(0, Environment.NUM_ACTIONS, size=len(prices))
+    confidences = rng.random(len(prices))
+
+    simulate(prices[:10], actions[:10], confidences[:10], initial_balance, min_trading_budget, max_trading_budget)
+    elapsed = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        simulate(prices, actions, confidences, initial_balance, min_trading_budget, max_trading_budget)
+        elapsed.append(time.perf_counter() - start)
+    return {'bars': len(prices), 'replay_seconds': min(elapsed), 'numba': NUMBA_AVAILABLE}
+
+
+# 로컬 stub kline 서버에서 전체 기간을 수집하는 속도 (pages/sec, best of repeat)와 페이지당 파싱 시간
+def bench_crawl(chart_data, symbol, interval, limit=1500, max_concurrency=8, repeat=3):
+    async def run():
+        server = StubKlineServer({symbol: {interval: chart_data}})
+        url = await server.start()
+        metrics = Metrics()
+        client = RestClient(asyncio.get_running_loop(), max_weight_per_minute=10**9, metrics=metrics)
+        crawler = Crawler(client, max_concurrency=max_concurrency)
+        windows = split_windows(int(chart_data['Open time'].iloc[0]), int(chart_data['Close time'].iloc[-1]) + 1, interval, limit)
+        elapsed = []
+        try:
+            for _ in range(repeat):
+                start = time.perf_counter()
+                df = await crawler.get_coin_candle_windows(url, symbol, interval, windows, limit)
+                elapsed.append(time.perf_counter() - start)
+        finally:
+            await client.close()
+            await server.stop()
+
+        stats = metrics.summary()
+        parse = stats['timers']['crawler.parse']
+        return {'pages': len(windows),
+                'candles': len(df),
+                'seconds': min(elapsed),
+                'pages_per_sec': len(windows) / min(elapsed),
+                'bytes': stats['counters']['crawler.bytes'] // repeat,
+                'parse_seconds_per_page': parse['total'] / parse['count']}
+    return asyncio.run(run())
+
+
+def max_rss_mb():
+    # 프로세스의 최대 RSS (Linux : KB, macOS : bytes 단위)
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / 2**20 if sys.platform == 'darwin' else max_rss / 2**10
+
+
+# RolloutPool worker 수에 따른 transition 처리량 (transitions/sec). 코어 수까지 선형 증가가 목표
+def bench_rollout(chart_data, training_data, num_workers_list=(1, 2, 4, 8, 16, 32), num_batches=200, batch_size=256,
+                  envs_per_worker=8, initial_balance=10000, min_trading_budget=70, max_trading_budget=1000):
+    results = {}
+    for num_workers in num_workers_list:
+        with RolloutPool(chart_data, training_data, initial_balance, min_trading_budget, max_trading_budget,
+                         num_workers=num_workers, envs_per_worker=envs_per_worker, batch_size=batch_size) as pool:
+            # worker 시작 비용 제외 : 첫 batch 이후부터 측정
+            slot, _ = pool.get()
+            pool.release(slot)
+            start = time.perf_counter()
+            for _ in pool.batches(num_batches):
+                pass
+            elapsed = time.perf_counter() - start
+        results[num_workers] = num_batches * batch_size / elapsed
+    return results
+
+
+# CSV(pd.read_csv) vs CandleStore(np.load / memmap) 로딩 시간 비교 (초, best of repeat)
+def bench_load(csv_path, store_root='./data/store', repeat=20):
+    store = CandleStore(store_root)
+    symbol, interval = parse_csv_name(csv_path)
+    if not store.exists(symbol, interval):
+        convert_csv(csv_path, store, symbol, interval)
+
+    def best(func):
+        elapsed = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            elapsed.append(time.perf_counter() - start)
+        return min(elapsed)
+
+    return {'read_csv': best(lambda: pd.read_csv(csv_path)),
+            'store_load': best(lambda: store.load(symbol, interval, mmap=False)),
+            'store_mmap': best(lambda: store.load(symbol, interval, mmap=True))}
+
+
+def run_suite(csv_paths:List[str], num_workers_list:List[int]=(), store_root:str='./data/store') -> dict:
+    """
+    csv 파일별 벤치마크 결과 + 실행 환경 정보.
+    {'meta' : {...}, 'btc_1h' : {'load', 'env_step', 'fast_forward', 'replay', 'crawl', ('rollout')}, ..., 'memory' : {'max_rss_mb'}}
+    """
+    results = {'meta': {'python': platform.python_version(),
+                        'numpy': np.__version__,
+                        'pandas': pd.__version__,
+                        'numba': NUMBA_AVAILABLE,
+                        'platform': platform.platform(),
+                        'cpu_count': os.cpu_count(),
+                        'time': time.strftime('%Y-%m-%dT%H:%M:%S')}}
+    for csv_path in csv_paths:
+        name = os.path.splitext(os.path.basename(csv_path))[0]
+        symbol, interval = parse_csv_name(csv_path)
+        chart_data, training_data = load_chart_data(csv_path)
+        results[name] = {'load': bench_load(csv_path, store_root),
+                         'env_step': bench_env_step(chart_data, training_data),
+                         'fast_forward': bench_fast_forward(chart_data, training_data),
+                         'replay': bench_replay(chart_data),
+                         'crawl': bench_crawl(chart_data, symbol, interval)}
+        if num_workers_list:
+            results[name]['rollout'] = {str(num_workers): {'steps_per_sec': steps_per_sec} for num_workers, steps_per_sec
+                                        in bench_rollout(chart_data, training_data, num_workers_list).items()}
+    results['memory'] = {'max_rss_mb': max_rss_mb()}
+    return results
+
+
+def flatten(results:dict, prefix:str='') -> Dict[str, float]:
+    # {'btc_1h': {'env_step': {'steps_per_sec': 1}}} -> {'btc_1h.env_step.steps_per_sec': 1}
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f'{prefix}{key}.'))
+        else:
+            flat[f'{prefix}{key}'] = value
+    return flat
+
+
+def compare(results:dict, baseline:dict, threshold:float=0.1) -> List[dict]:
+    """
+    baseline 대비 threshold(비율) 이상 나빠진 지표 목록. COMPARED_METRICS에 있는 지표만 비교.
+    """
+    current, previous = flatten(results), flatten(baseline)
+    regressions = []
+    for path, value in current.items():
+        higher_is_better = COMPARED_METRICS.get(path.rsplit('.', 1)[-1])
+        base = previous.get(path)
+        if higher_is_better is None or not value or not base:
+            continue
+        change = value / base - 1
+        if (higher_is_better and change < -threshold) or (not higher_is_better and change > threshold):
+            regressions.append({'metric': path, 'baseline': base, 'current': value, 'change': change})
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--data', nargs='+', default=['./data/btc_1h.csv', './data/eth_1h.csv'])
+    parser.add_argument('--workers', type=int, nargs='*', default=[], help='RolloutPool worker 수 목록 (생략시 rollout 벤치마크 제외)')
+    parser.add_argument('--output', default=None, help='결과 JSON 저장 경로')
+    parser.add_argument('--baseline', default=None, help='비교할 baseline JSON 경로')
+    parser.add_argument('--threshold', type=float, default=0.1, help='regression 판정 비율 (0.1 : 10%%)')
+    args = parser.parse_args()
+
+    results = run_suite(args.data, args.workers)
+    output = orjson.dumps(results, option=orjson.OPT_INDENT_2)
+    print(output.decode())
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'wb') as f:
+            f.write(output)
+
+    if args.baseline:
+        with open(args.baseline, 'rb') as f:
+            regressions = compare(results, orjson.loads(f.read()), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION | {regression['metric']} : {regression['baseline']:.6g} -> {regression['current']:.6g} ({regression['change']:+.1%})")
+        # regression이 있으면 0이 아닌 종료 코드 (CI 등에서 사용)
+        sys.exit(1 if regressions else 0)
@@ -1,4 +1,6 @@
+import os
 import time
+import random
 import itertools
 import asyncio
 import aiohttp
@@ -10,44 +12,346 @@ import numpy as np
 import pandas as pd
 
 
-from typing import List, Union
+from typing import Dict, List, Union
 from fake_useragent import UserAgent
 from enum import Enum
 
+from store import CANDLE_DTYPES, CandleStore, csv_filename, sort_candle_columns
+from metrics import Metrics, NULL_TIMER
+
 
 class Endpoints(Enum):
     BINANCE_FUTURES_CANDLESTICK_API = 'https://fapi.binance.com/fapi/v1/klines'
+    BINANCE_FUTURES_STREAM = 'wss://fstream.binance.com/stream'
+
+
+# interval 문자열 -> 캔들 1개의 길이(ms)
+INTERVAL_MS = {'1m': 60_000, '3m': 180_000, '5m': 300_000, '15m': 900_000, '30m': 1_800_000,
+               '1h': 3_600_000, '2h': 7_200_000, '4h': 14_400_000, '6h': 21_600_000, '8h': 28_800_000,
+               '12h': 43_200_000, '1d': 86_400_000, '3d': 259_200_000, '1w': 604_800_000}
+
+
+def to_timestamp(date:str) -> int:
+    return int(datetime.datetime.strptime(date, "%Y-%m-%d").timestamp() * 1000)
+
+
+def split_windows(startTime:int, endTime:int, interval:str, limit:int=1500) -> List[tuple]:
+    """
+    [startTime, endTime) 구간을 limit개 캔들 단위의 (windowStart, windowEnd) 목록으로 분할.
+    windowEnd는 Binance endTime 파라미터와 같이 포함(inclusive) 경계.
+    """
+    window_ms = INTERVAL_MS[interval] * limit
+    return [(start, min(start + window_ms, endTime) - 1) for start in range(startTime, endTime, window_ms)]
+
+
+def candle_path(save_dir:str, symbol:str, interval:str) -> str:
+    # 'BTCUSDT', '1h' -> '{save_dir}/btc_1h.csv'
+    return os.path.join(save_dir, csv_filename(symbol, interval))
+
+
+def candles_after(df:pd.DataFrame, lastCloseTime:Union[int, None]) -> pd.DataFrame:
+    # 저장된 마지막 캔들 이후의 행만 선택 (저장된 캔들이 없으면 전체)
+    return df if lastCloseTime is None else df[df['Close time'] > lastCloseTime]
+
+
+async def gather_or_cancel(*aws) -> list:
+    # 하나라도 실패하면 나머지 요청을 취소하고 예외 전달 (실패한 crawl이 rate limit 예산을 계속 쓰지 않도록)
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+
+def log_metrics(stats:dict) -> None:
+    # Metrics의 export_fn : 집계 결과를 한 줄로 기록
+    logger.info(f"METRICS | {orjson.dumps(stats).decode()}")
+
+
+def kline_weight(limit:int) -> int:
+    # /fapi/v1/klines request weight (limit 구간별)
+    if limit < 100:
+        return 1
+    elif limit < 500:
+        return 2
+    elif limit <= 1000:
+        return 5
+    return 10
+
+
+def read_last_close_time(path:str) -> Union[int, None]:
+    """
+    CSV 전체를 읽지 않고 파일 끝부분만 읽어 마지막 행의 Close time 반환. (파일/데이터 없으면 None)
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        header = f.readline()
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(size - 4096, len(header)))
+        lines = f.read().splitlines()
+    if not lines or not lines[-1].strip():
+        return None
+    columns = header.decode().strip().split(',')
+    return int(float(lines[-1].decode().split(',')[columns.index('Close time')]))
+
+
+def append_candles(df:pd.DataFrame, path:str) -> int:
+    """
+    캔들을 파일 끝에 추가하고 디스크에 반영(fsync)된 파일 크기를 반환.
+    """
+    write_header = not os.path.exists(path) or os.path.getsize(path) == 0
+    with open(path, 'a', newline='') as f:
+        df.to_csv(f, header=write_header, index=False)
+        f.flush()
+        os.fsync(f.fileno())
+        return f.tell()
 
 
+def write_checkpoint(path:str, committed_size:int, lastCloseTime:int) -> None:
+    # tmp 파일에 쓰고 rename 하여 checkpoint를 원자적으로 교체
+    tmp_path = f'{path}.ckpt.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(orjson.dumps({'size': committed_size, 'close_time': lastCloseTime}))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, f'{path}.ckpt')
+
+
+def restore_checkpoint(path:str) -> Union[int, None]:
+    """
+    checkpoint가 있으면 commit되지 않은 append 내용을 잘라내고 마지막 commit된 Close time 반환.
+    """
+    checkpoint_path = f'{path}.ckpt'
+    if not os.path.exists(checkpoint_path) or not os.path.exists(path):
+        return None
+    with open(checkpoint_path, 'rb') as f:
+        checkpoint = orjson.loads(f.read())
+    if os.path.getsize(path) < checkpoint['size']:
+        logger.warning(f"STALE CHECKPOINT | {checkpoint_path}")
+        return None
+    os.truncate(path, checkpoint['size'])
+    logger.info(f"RESUME | {path}, close_time : {checkpoint['close_time']}")
+    return checkpoint['close_time']
+
+
+def remove_checkpoint(path:str) -> None:
+    if os.path.exists(f'{path}.ckpt'):
+        os.remove(f'{path}.ckpt')
+
+
+class KlineBuffer:
+    """
+    kline 응답(raw bytes)을 orjson으로 파싱해 필요한 컬럼만 타입별 numpy 버퍼에 바로 기록.
+    버퍼는 미리 할당된 크기를 넘으면 2배씩 늘어나며, 응답의 Python 객체는 페이지 단위로만 유지됨.
+    """
+    # Binance kline 응답의 컬럼 위치 -> 저장 컬럼
+    COLUMN_INDEX = {'Open time': 0, 'Open': 1, 'High': 2, 'Low': 3, 'Close': 4, 'Volume': 5, 'Close time': 6}
+
+    def __init__(self, capacity:int=1500) -> None:
+        self.columns = {column: np.empty(capacity, dtype=dtype) for column, dtype in CANDLE_DTYPES.items()}
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def reserve(self, num_rows:int) -> None:
+        capacity = len(self.columns['Open time'])
+        if self.size + num_rows <= capacity:
+            return
+        capacity = max(capacity * 2, self.size + num_rows)
+        for column, buffer in self.columns.items():
+            grown = np.empty(capacity, dtype=buffer.dtype)
+            grown[:self.size] = buffer[:self.size]
+            self.columns[column] = grown
+
+    def append_raw(self, raw:bytes) -> int:
+        # 추가된 행 수 반환 (0 : 데이터 없음)
+        rows = orjson.loads(raw)
+        num_rows = len(rows)
+        if num_rows == 0:
+            return 0
+        self.reserve(num_rows)
+        for column, index in self.COLUMN_INDEX.items():
+            self.columns[column][self.size:self.size + num_rows] = [row[index] for row in rows]
+        self.size += num_rows
+        return num_rows
+
+    def to_columns(self) -> Dict[str, np.ndarray]:
+        """
+        Open time 기준 정렬 + 중복 제거된 컬럼 배열 반환. (이미 정렬된 경우 복사 없이 view 반환)
+        """
+        return sort_candle_columns({column: buffer[:self.size] for column, buffer in self.columns.items()})
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.to_columns())
+
+
+class RequestError(Exception):
+    """
+    재시도 후에도 실패한 요청. (빈 응답 = 데이터 없음 과 구분하기 위해 사용)
+    """
+    def __init__(self, message:str, status:int=None) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class WeightRateLimiter:
+    """
+    여러 coroutine이 공유하는 request weight 기반 token bucket.
+    분당 max_weight_per_minute 만큼 균등하게 충전되며, 서버가 알려주는 사용 weight(X-MBX-USED-WEIGHT-1M)와
+    Retry-After(429/418) 를 반영해 남은 예산을 보정.
+    """
+    def __init__(self, max_weight_per_minute:int=2400) -> None:
+        self.capacity = max_weight_per_minute
+        self.refill_rate = max_weight_per_minute / 60
+        self.tokens = float(max_weight_per_minute)
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_rate)
+        self.updated_at = now
+
+    async def acquire(self, weight:int=1) -> None:
+        while True:
+            self._refill()
+            wait = self.blocked_until - time.monotonic()
+            if wait <= 0 and self.tokens >= weight:
+                self.tokens -= weight
+                return
+            wait = max(wait, (weight - self.tokens) / self.refill_rate)
+            await asyncio.sleep(wait)
+
+    def update_used_weight(self, used_weight:int) -> None:
+        # 서버 기준 사용량이 더 많으면 (다른 프로세스/IP 공유 등) 남은 token을 줄임
+        self._refill()
+        self.tokens = min(self.tokens, max(self.capacity - used_weight, 0))
+
+    def block(self, seconds:float) -> None:
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+
 
 class RestClient:
-    def __init__(self, loop) -> None:
+    RETRY_STATUS = {418, 429, 500, 502, 503, 504}
+
+    def __init__(self,
+                 loop,
+                 max_weight_per_minute:int=2400,
+                 max_retries:int=5,
+                 backoff_base:float=0.5,
+                 backoff_max:float=30,
+                 timeout:float=10,
+                 metrics:Metrics=None) -> None:
         self.ip_address : List[str] = ['0.0.0.0']
+        self.rate_limiter = WeightRateLimiter(max_weight_per_minute)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        # metrics : 요청 지연/응답 bytes/재시도/rate limit 대기/파싱 시간 집계 (None이면 계측하지 않음)
+        self.metrics = metrics
         user_agent = UserAgent()
 
-        self.sessions = itertools.cycle([aiohttp.ClientSession(loop=loop,
-                                                               headers={'User-Agent':user_agent.random},
-                                                               json_serialize=orjson.dumps,
-                                                               connector=aiohttp.TCPConnector(local_addr=(ip, 0))) for ip in self.ip_address]
-                                        )
+        self.sessions_list = [aiohttp.ClientSession(loop=loop,
+                                                    headers={'User-Agent':user_agent.random},
+                                                    json_serialize=orjson.dumps,
+                                                    connector=aiohttp.TCPConnector(local_addr=(ip, 0))) for ip in self.ip_address]
+        self.sessions = itertools.cycle(self.sessions_list)
         
+    def timer(self, name:str):
+        return self.metrics.timer(name) if self.metrics is not None else NULL_TIMER
+
+    def incr(self, name:str, value:int=1) -> None:
+        if self.metrics is not None:
+            self.metrics.incr(name, value)
+
+    def backoff(self, attempt:int) -> float:
+        # jitter가 적용된 exponential backoff (full jitter)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
     async def get(self,
                   url,
                   params=None,
-                  timeout=1,
-                  headers=None) -> dict:
-        async with next(self.sessions).get(url=url, params=params, timeout=timeout, headers=headers) as response:
-            return await response.json()
+                  timeout=None,
+                  headers=None,
+                  weight:int=1,
+                  raw:bool=False) -> Union[dict, list, bytes]:
+        timeout = aiohttp.ClientTimeout(total=timeout or self.timeout)
+        for attempt in range(self.max_retries + 1):
+            with self.timer('crawler.rate_limit_wait'):
+                await self.rate_limiter.acquire(weight)
+            try:
+                with self.timer('crawler.request'):
+                    async with next(self.sessions).get(url=url, params=params, timeout=timeout, headers=headers) as response:
+                        used_weight = response.headers.get('X-MBX-USED-WEIGHT-1M')
+                        if used_weight is not None:
+                            self.rate_limiter.update_used_weight(int(used_weight))
+                        body = await response.read() if response.status == 200 else None
+
+                if body is not None:
+                    self.incr('crawler.requests')
+                    self.incr('crawler.bytes', len(body))
+                    if self.metrics is not None:
+                        self.metrics.maybe_export()
+                    # raw=True : 디코딩하지 않은 응답 bytes 반환 (KlineBuffer에서 직접 파싱)
+                    if raw:
+                        return body
+                    with self.timer('crawler.parse'):
+                        return orjson.loads(body)
+
+                message = f"{response.status} {response.reason} | {url} {params}"
+                self.incr(f'crawler.status_{response.status}')
+                if response.status not in self.RETRY_STATUS:
+                    raise RequestError(message, response.status)
+
+                # 429(rate limit)/418(IP ban) : Retry-After 만큼 모든 요청을 멈춤
+                retry_after = response.headers.get('Retry-After')
+                if response.status in (418, 429) and retry_after is not None:
+                    self.rate_limiter.block(float(retry_after))
+                    delay = 0
+                else:
+                    delay = self.backoff(attempt)
+                error = RequestError(message, response.status)
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = RequestError(f"{type(e).__name__} {e} | {url} {params}")
+                self.incr('crawler.connection_errors')
+                delay = self.backoff(attempt)
+
+            if attempt == self.max_retries:
+                break
+            logger.warning(f"RETRY {attempt + 1}/{self.max_retries} | {error}")
+            self.incr('crawler.retries')
+            with self.timer('crawler.backoff'):
+                await asyncio.sleep(delay)
+        raise error
+
+    async def close(self) -> None:
+        for session in set(self.sessions_list):
+            await session.close()
 
 
 
 class Crawler:
     
-    def __init__(self):
-        loop = asyncio.get_event_loop()
-        self.client = RestClient(loop)
+    def __init__(self, client:RestClient=None, max_concurrency:int=8, metrics:Metrics=None, store:CandleStore=None):
+        # 여러 Crawler/심볼이 하나의 RestClient(세션 + rate limiter + metrics)를 공유할 수 있음
+        if client is None:
+            loop = asyncio.get_event_loop()
+            client = RestClient(loop, metrics=metrics)
+        self.client = client
+        # save=True로 수집한 캔들의 저장 위치 (Environment, FeaturePipeline 등이 읽는 저장소)
+        self.store = store if store is not None else CandleStore()
+        self.max_concurrency = max_concurrency
+        self.semaphore = asyncio.Semaphore(max_concurrency)
 
-    async def get_coin_candle_data(self, url, symbol:str, interval:str, startTime:int, limit:int=1500)->List:
+    async def get_coin_candle_data(self, url, symbol:str, interval:str, startTime:int, limit:int=1500, endTime:int=None)->List:
         """
         [
           [
@@ -66,77 +370,166 @@ class Crawler:
           ]
         ]
 
+        빈 리스트는 "해당 구간에 데이터 없음"을 의미하며, 요청 실패는 재시도 후 RequestError로 전달됨.
         """
-        response = []
+        params = {'symbol' : symbol,
+                'interval' : interval,
+                'startTime' : startTime,
+                'limit' : limit}
+        if endTime is not None:
+            params['endTime'] = endTime
+
         try:
-            params = {'symbol' : symbol,
-                    'interval' : interval,
-                    'startTime' : startTime,
-                    'limit' : limit}
-            
-            response = await self.client.get(url = url, params = params)
-            
-            if response:
-                startTime, endTime = response[0][0], response[-1][0]
-                logger.info(f"SYMBOL :{symbol} | startTime : {datetime.datetime.utcfromtimestamp(startTime/1000).strftime('%Y-%m-%d %H:%M:%S')}, endTime : {datetime.datetime.utcfromtimestamp(endTime/1000).strftime('%Y-%m-%d %H:%M:%S')}")
-            
-        except Exception as e:
-            logger.error(e)
+            async with self.semaphore:
+                response = await self.client.get(url = url, params = params, weight = kline_weight(limit))
+        except RequestError as e:
+            logger.error(f"SYMBOL :{symbol} | {e}")
+            raise
+
+        self.client.incr('crawler.candles', len(response))
         return response
 
 
 
-    async def get_coin_candle_all(self, url, symbol:str, interval:str, startTime:int, limit:int=1500, save:bool=False, save_path:str='./') -> pd.DataFrame:
-        logger.info(f"CRAWLING START | SYMBOL :{symbol}, INTERVAL : {interval}")
-        startTime = int(datetime.datetime.strptime(startTime, "%Y-%m-%d").timestamp() * 1000)
-        
-        candle_list, iter = [], 0
-        
-        while True:
-            response = await self.get_coin_candle_data(url, symbol, interval, startTime, limit)
-            
-            # 반환 데이터 없으면 종료
-            if len(response) == 0:
-                break
+    async def get_coin_candle_raw(self, url, symbol:str, interval:str, startTime:int, limit:int=1500, endTime:int=None) -> bytes:
+        # get_coin_candle_data와 동일한 요청, 응답을 디코딩하지 않은 bytes로 반환
+        params = {'symbol' : symbol,
+                'interval' : interval,
+                'startTime' : startTime,
+                'limit' : limit}
+        if endTime is not None:
+            params['endTime'] = endTime
 
-            startTime = response[-1][6] + 1
-            candle_list.extend(response)
-            iter += 1
-            await asyncio.sleep(1)
+        try:
+            async with self.semaphore:
+                return await self.client.get(url = url, params = params, weight = kline_weight(limit), raw = True)
+        except RequestError as e:
+            logger.error(f"SYMBOL :{symbol} | {e}")
+            raise
+
+
+    async def get_coin_candle_windows(self, url, symbol:str, interval:str, windows:List[tuple], limit:int=1500) -> pd.DataFrame:
+        # window들을 동시 요청, 응답이 도착하는 대로 KlineBuffer에 파싱 후 Open time 기준 정렬/중복 제거
+        buffer = KlineBuffer(capacity=limit * max(min(len(windows), self.max_concurrency), 1))
+
+        async def fetch(windowStart:int, windowEnd:int) -> None:
+            raw = await self.get_coin_candle_raw(url, symbol, interval, windowStart, limit, windowEnd)
+            # 페이지별 로그 대신 metrics에 집계 (Metrics export_fn으로 주기적 출력)
+            with self.client.timer('crawler.parse'):
+                num_rows = buffer.append_raw(raw)
+            self.client.incr('crawler.candles', num_rows)
+
+        await gather_or_cancel(*[fetch(windowStart, windowEnd) for windowStart, windowEnd in windows])
+        return buffer.to_frame()
+
+
+    async def get_coin_candle_all(self, url, symbol:str, interval:str, startTime:str, limit:int=1500, save:bool=False, save_path:str=None, endTime:str=None,
+                                  incremental:bool=False, checkpoint_windows:int=32) -> pd.DataFrame:
+        """
+        save=True : 수집한 캔들을 CandleStore(self.store)에 저장. save_path(CSV)가 주어지면 같은 캔들을 CSV로도 export.
+        incremental=True : 저장소에 저장된 마지막 Close time 이후의 (마감된) 캔들만 수집해 반환.
+                           save=True면 checkpoint_windows개 window마다 저장소에 append 하므로(CSV export는 append + checkpoint)
+                           중단된 backfill은 다음 실행에서 이어서 진행됨. (save=False면 저장소/파일은 읽기만 함)
+        """
+        logger.info(f"CRAWLING START | SYMBOL :{symbol}, INTERVAL : {interval}")
+        startTime = to_timestamp(startTime)
+        endTime = to_timestamp(endTime) if endTime else int(time.time() * 1000)
 
+        if incremental:
+            return await self.get_coin_candle_incremental(url, symbol, interval, startTime, endTime, limit, save, save_path, checkpoint_windows)
 
-        logger.info(f"CRAWLING END |SYMBOL :{symbol}, ITER : {iter}, DATA LENGTH : {len(candle_list)}")
-        # dataframe 정리
-        df_response = pd.DataFrame(candle_list, columns=['Open time', 'Open', 'High', 'Low', 'Close', 'Volume', 'Close time', 'Quote asset volume', 'Number of trades', 'Taker buy base asset volume', 'Taker buy quote asset volume', 'Ignore'])
-        df_response.drop(columns=['Quote asset volume', 'Number of trades', 'Taker buy base asset volume', 'Taker buy quote asset volume', 'Ignore'], axis=1, inplace=True)
+        # 전체 구간을 limit개 캔들 window로 미리 분할 후 동시 요청
+        windows = split_windows(startTime, endTime, interval, limit)
+        df_response = await self.get_coin_candle_windows(url, symbol, interval, windows, limit)
+        logger.info(f"CRAWLING END |SYMBOL :{symbol}, ITER : {len(windows)}, DATA LENGTH : {len(df_response)}")
         
         if save:
-            df_response.to_csv(path_or_buf=save_path, index=False)
+            # 아직 마감되지 않은 캔들은 저장하지 않음 (incremental 실행이 마감된 값으로 이어서 수집)
+            df_closed = df_response[df_response['Close time'] < endTime]
+            self.store.write(symbol, interval, df_closed)
+            if save_path is not None:
+                df_closed.to_csv(path_or_buf=save_path, index=False)
+                remove_checkpoint(save_path)
 
         return df_response
 
 
+    async def get_coin_candle_incremental(self, url, symbol:str, interval:str, startTime:int, endTime:int, limit:int, save:bool, save_path:str,
+                                          checkpoint_windows:int) -> pd.DataFrame:
+        # (1) 저장소의 마지막 Close time 이후부터 수집 (저장소 append는 디렉토리 교체로 원자적이므로 checkpoint 불필요)
+        storeCloseTime = self.store.last_close_time(symbol, interval)
+        lastCloseTimes = [storeCloseTime]
+        csv_export = save and save_path is not None
+        if csv_export:
+            # CSV export : 중단된 실행의 checkpoint가 있으면 commit된 지점까지 파일을 되돌림
+            csvCloseTime = restore_checkpoint(save_path)
+            if csvCloseTime is None:
+                csvCloseTime = read_last_close_time(save_path)
+            # 첫 append 전에 현재 파일 크기를 checkpoint : append 도중 중단되어도 다음 실행에서 잘린 행을 되돌림
+            write_checkpoint(save_path, os.path.getsize(save_path) if os.path.exists(save_path) else 0, csvCloseTime)
+            lastCloseTimes.append(csvCloseTime)
+        # 저장소와 CSV 중 더 뒤처진 쪽부터 수집하고, 각각 자신의 마지막 캔들 이후 행만 추가
+        if None not in lastCloseTimes:
+            startTime = max(startTime, min(lastCloseTimes) + 1)
+
+        # (2) checkpoint_windows개 window 단위로 수집 -> 저장소 append (-> CSV append + checkpoint)
+        windows = split_windows(startTime, endTime, interval, limit)
+        df_list = []
+        for i in range(0, len(windows), checkpoint_windows):
+            df_response = await self.get_coin_candle_windows(url, symbol, interval, windows[i:i + checkpoint_windows], limit)
+            # 아직 마감되지 않은 캔들은 저장하지 않음 (다음 실행에서 마감된 값으로 수집)
+            df_response = df_response[df_response['Close time'] < endTime]
+            if save:
+                df_new = candles_after(df_response, storeCloseTime)
+                if len(df_new):
+                    self.store.append(symbol, interval, df_new)
+                    storeCloseTime = int(df_new['Close time'].iloc[-1])
+            if csv_export:
+                df_new = candles_after(df_response, csvCloseTime)
+                if len(df_new):
+                    committed_size = append_candles(df_new, save_path)
+                    csvCloseTime = int(df_new['Close time'].iloc[-1])
+                    write_checkpoint(save_path, committed_size, csvCloseTime)
+            df_list.append(df_response)
+
+        # (3) 완료 시 checkpoint 제거
+        if csv_export:
+            remove_checkpoint(save_path)
+        df_response = pd.concat(df_list, ignore_index=True) if df_list else pd.DataFrame(columns=list(CANDLE_DTYPES)).astype(CANDLE_DTYPES)
+        logger.info(f"CRAWLING END |SYMBOL :{symbol}, ITER : {len(windows)}, NEW DATA LENGTH : {len(df_response)}")
+        return df_response
+
+
+    async def get_coin_candle_many(self, url, symbols:List[str], intervals:List[str], startTime:str, limit:int=1500, save:bool=False, save_dir:str=None, endTime:str=None,
+                                   incremental:bool=False) -> dict:
+        """
+        여러 symbol/interval 조합을 하나의 RestClient로 동시에 수집.
+        save=True면 self.store에 저장하고, save_dir이 주어지면 {save_dir}/btc_1h.csv 형식의 CSV로도 export.
+        Output : {(symbol, interval) : DataFrame}
+        """
+        keys = list(itertools.product(symbols, intervals))
+        results = await gather_or_cancel(*[self.get_coin_candle_all(url, symbol, interval, startTime, limit,
+                                                                   save=save,
+                                                                   save_path=candle_path(save_dir, symbol, interval) if save_dir else None,
+                                                                   endTime=endTime,
+                                                                   incremental=incremental)
+                                           for symbol, interval in keys])
+        return dict(zip(keys, results))
+
+
 async def main():
-    cralwer_btc = Crawler()
-    cralwer_eth = Crawler()
-
-    await asyncio.gather(
-        cralwer_btc.get_coin_candle_all(url=Endpoints.BINANCE_FUTURES_CANDLESTICK_API.value, 
-                                                  symbol='BTCUSDT', 
-                                                  interval='1h',
-                                                  startTime='2018-01-01', 
-                                                  limit=1500,
-                                                  save=True,
-                                                  save_path='./data/btc_1h.csv'),
-
-        cralwer_eth.get_coin_candle_all(url=Endpoints.BINANCE_FUTURES_CANDLESTICK_API.value, 
-                                                  symbol='ETHUSDT', 
-                                                  interval='1h',
-                                                  startTime='2018-01-01', 
-                                                  limit=1500,
-                                                  save=True,
-                                                  save_path='./data/eth_1h.csv')                          
-    )
+    metrics = Metrics(export_fn=log_metrics, export_interval=10)
+    crawler = Crawler(metrics=metrics)
+
+    await crawler.get_coin_candle_many(url=Endpoints.BINANCE_FUTURES_CANDLESTICK_API.value,
+                                       symbols=['BTCUSDT', 'ETHUSDT'],
+                                       intervals=['1h'],
+                                       startTime='2018-01-01',
+                                       limit=1500,
+                                       save=True,
+                                       incremental=True)
+    metrics.export()
+    await crawler.client.close()
 
 
 if __name__ == '__main__':
@@ -1,5 +1,11 @@
+import time
 import numpy as np
 
+from operator import attrgetter
+from store import CandleColumns
+from feature import LookbackWindows
+from metrics import Metrics
+
 
 class Position:
     LONG = 0
@@ -16,14 +22,58 @@ class Action:
     SHORT = 2
 
 
+# DataFrame/배열을 한 번만 연속(C-contiguous) numpy 배열로 변환 : (chart float64, 종가 1-D, training float32)
+# CandleStore에서 읽은 CandleColumns(memmap)는 복사 없이 그대로 사용
+def to_contiguous_arrays(chart_data, training_data, close_price_idx):
+    if isinstance(chart_data, CandleColumns):
+        chart_array, prices = chart_data, chart_data['Close']
+    else:
+        chart_array = np.ascontiguousarray(chart_data, dtype=np.float64)
+        prices = chart_array[:, close_price_idx]
+    training_array = np.ascontiguousarray(training_data, dtype=np.float32)
+    return chart_array, prices, training_array
+
+
+def valid_start_indices(open_time, interval_ms, warmup=0, length=None):
+    """
+    episode 시작 가능 index 배열. (1) feature warmup 이전 구간, (2) episode 구간 안에 데이터 공백(gap)이 있는 시작점을 제외.
+    length가 None이면 episode는 데이터 끝까지 진행되므로 시작점 이후에 공백이 없어야 함.
+    """
+    open_time = np.asarray(open_time, dtype=np.int64)
+    num_rows = len(open_time)
+    # gap_count[j] : j 이전 캔들 사이의 공백 개수 (누적)
+    gap_count = np.concatenate([[0], np.cumsum(np.diff(open_time) != interval_ms)])
+    if length is None:
+        starts = np.arange(warmup, num_rows - 1)
+        ends = np.full(len(starts), num_rows - 1)
+    else:
+        starts = np.arange(warmup, num_rows - length + 1)
+        ends = starts + length - 1
+    return starts[gap_count[ends] == gap_count[starts]]
+
+
+# snapshot()/restore() 대상 : episode 위치 + 계좌 상태
+ACCOUNT_STATE = ('start_idx', 'end_idx', 'idx', 'observation',
+                 'balance', 'num_stocks', 'portfolio_value', 'num_long', 'num_short', 'num_hold',
+                 'hold_ratio', 'profitloss', 'avg_position_price', 'position')
+get_account_state = attrgetter(*ACCOUNT_STATE)
+
 
 class Environment():
     # Agent Balance State : [포지션/자금 비율, 손익, 평균 수익률, 현재 포지션]
     B_STATE_DIM = 4
     NUM_ACTIONS = len([Action.LONG, Action.HOLD, Action.SHORT])
     CLOSE_PRICE_IDX = 4
+    # step_until : HOLD에는 confidence가 쓰이지 않으므로 고정 policy 사용, 한 번에 검사할 bar 수(처음 크기, 2배씩 증가)
+    HOLD_POLICY = (0.0,) * NUM_ACTIONS
+    FAST_FORWARD_CHUNK = 256
 
-    def __init__(self, chart_data, training_data, initial_balance, min_trading_budget, max_trading_budget):
+    # 인스턴스 속성을 고정 (dict 없이 slot에 저장)
+    __slots__ = ('initial_balance', 'min_trading_budget', 'max_trading_budget', 'chart_data', 'prices', 'training_data',
+                 'valid_starts', 'window_size', 'windows') + ACCOUNT_STATE
+
+    def __init__(self, chart_data, training_data, initial_balance, min_trading_budget, max_trading_budget, window_size=None,
+                 valid_starts=None):
         # 초기 자본금 설정
         self.initial_balance = initial_balance
 
@@ -31,12 +81,20 @@ class Environment():
         self.min_trading_budget = min_trading_budget
         self.max_trading_budget = max_trading_budget
 
-        # chart 정보
-        self.chart_data = chart_data
-        self.training_data = training_data
+        # chart 정보 : 생성 시 한 번만 배열로 변환하고, 종가는 1-D 배열로 캐싱
+        self.chart_data, self.prices, self.training_data = to_contiguous_arrays(chart_data, training_data, self.CLOSE_PRICE_IDX)
         self.observation = None
         self.idx = -1
 
+        # episode 구간 : [start_idx, end_idx). valid_starts는 random start 시 sampling할 시작 index 목록
+        self.start_idx = 0
+        self.end_idx = len(self.prices)
+        self.valid_starts = None if valid_starts is None else np.asarray(valid_starts, dtype=np.int64)
+
+        # window_size 설정시 chart state : (window_size, n_features) lookback view
+        self.window_size = window_size
+        self.windows = LookbackWindows(self.training_data, window_size) if window_size else None
+
         # balance : 잔고 내역 및 거래 정보
         self.balance = initial_balance   # 현재 현금 잔고
         self.num_stocks = 0              # 보유 주식 수
@@ -52,9 +110,15 @@ class Environment():
         self.position = 1                # 현재 포지션 (0 : Long, 1 : None, 2 : Short)
 
 
-    def reset(self):
+    # start_idx, length : episode 구간 [start_idx, start_idx + length). 데이터는 복사하지 않고 index만 이동.
+    # start_idx 없이 rng가 주어지면 valid_starts(없으면 전체 구간)에서 시작점을 sampling
+    def reset(self, start_idx=None, length=None, rng=None):
+        if start_idx is None:
+            start_idx = self.sample_start(rng, length) if rng is not None else 0
+        self.start_idx = int(start_idx)
+        self.end_idx = len(self.prices) if length is None else min(self.start_idx + length, len(self.prices))
         self.observation = None
-        self.idx = -1
+        self.idx = self.start_idx - 1
         self.balance = self.initial_balance
         self.portfolio_value = self.portfolio_value
         self.num_stocks = 0
@@ -66,15 +130,41 @@ class Environment():
         self.num_short = 0
         self.num_hold = 0
 
+    # 현재 시점의 episode 위치/계좌 상태를 tuple로 저장 (chart 데이터는 참조만 하므로 복사 없음)
+    # snapshot = env.snapshot(); env.step(action, policy); ...; env.restore(snapshot)
+    def snapshot(self):
+        return get_account_state(self)
+
+    def restore(self, snapshot):
+        for name, value in zip(ACCOUNT_STATE, snapshot):
+            setattr(self, name, value)
+
+    def sample_start(self, rng, length=None):
+        if self.valid_starts is not None:
+            return int(self.valid_starts[rng.integers(len(self.valid_starts))])
+        # 초기 관측 이후 적어도 한 번은 step 할 수 있는 시작점
+        last = len(self.prices) - (length if length is not None else 2)
+        return int(rng.integers(0, max(last, 0) + 1))
+
     def observe(self):
-        if len(self.chart_data) > self.idx + 1:
+        if self.end_idx > self.idx + 1:
             self.idx += 1
-            self.observation = self.chart_data.iloc[self.idx]
+            # 복사 없는 row view
+            self.observation = self.chart_data[self.idx]
             return self.observation
         return None
     
     def get_price(self):
-        return self.observation[self.CLOSE_PRICE_IDX]
+        return self.prices[self.idx]
+
+    def get_chart_state(self):
+        if self.windows is not None:
+            return self.windows[self.idx]
+        return self.training_data[self.idx]
+
+    # learner용 : 여러 시점의 chart state를 (batch, window_size, n_features)로 한 번에 반환
+    def get_windows(self, indices):
+        return self.windows.take(indices)
     
     # 결정된 Action(Long, Short)을 수행할 수 있는 최소 조건을 확인.
     def validate_action(self, action):
@@ -100,11 +190,11 @@ class Environment():
                 # 적어도 1주(거래 최소 금액)를 팔 수 있는지 확인
                 if self.balance < self.min_trading_budget * (1 + FEE.TRADING + FEE.SLIPPAGE):
                     return False
-        return False
+        return True
     
     # Action을 수행할 수 있을 때 진입 포지션의 양을 반환해주는 함수.
     def decide_trading_unit(self, confidence):
-        # [TODO] 이거 logging 하자. 얼마나 nan 많이 나오는지 체크해야 함.
+        # nan 발생 횟수는 ProfiledEnvironment 사용 시 metrics의 'env.nan_confidence'로 집계됨
         if np.isnan(confidence):
             trading_unit = self.min_trading_budget/self.get_price()
             return  round(max(trading_unit, 0), 4)
@@ -244,6 +334,7 @@ class Environment():
                 # (3.2.4) 공매도 물량 소진 X
                 else :
                     asset_buy_amount =  (2*self.avg_position_price - curr_price) * (1 - (FEE.TRADING + FEE.SLIPPAGE)) * trading_unit
+                    trading_budget = curr_price * (1 + (FEE.TRADING + FEE.SLIPPAGE)) * trading_unit
                     self.balance += asset_buy_amount  # balance 정보 갱신(*)
 
                 # (3.2.5) 진입 금액 존재시 정보 갱신
@@ -280,7 +371,7 @@ class Environment():
 
         # (4) 포지션 업데이트
         if self.num_stocks > 0:
-            self.postion = Position.LONG
+            self.position = Position.LONG
         elif self.num_stocks < 0:
             self.position = Position.SHORT
         else:
@@ -305,14 +396,14 @@ class Environment():
     def step(self, action=None, policy=None):
         observation = self.observe()
         # 다음 훈련 데이터가 없을 경우.
-        if (np.array(observation) == None).all():
+        if observation is None:
             done = True
             return None, None, 0, done, None
         
         # 훈련 시작 전 초기 데이터 반환
         if action == None:
             reward, avg_return, done  = 0, 0, False
-            chart_next_state = self.training_data[self.idx]
+            chart_next_state = self.get_chart_state()
             balance_next_state = (self.hold_ratio, self.profitloss, avg_return, self.position)
             return chart_next_state, balance_next_state, reward, done, None
         
@@ -335,7 +426,7 @@ class Environment():
                 avg_return = 1- (self.avg_position_price / self.get_price())
             
             # chart state, balance state 계산.
-            chart_next_state = self.training_data[self.idx]
+            chart_next_state = self.get_chart_state()
             balance_next_state = (self.hold_ratio, self.profitloss, avg_return, self.position)
             done = False
 
@@ -343,4 +434,332 @@ class Environment():
             if self.portfolio_value < self.initial_balance*0.20:
                 done = True
             
-            return chart_next_state, balance_next_state, reward, done, trading_unit
\ No newline at end of file
+            return chart_next_state, balance_next_state, reward, done, trading_unit
+
+    # HOLD 구간 fast-forward : 최대 n_steps개 bar를 HOLD로 진행하고, predicate가 True이거나 done(-80% 손실)이 되는 bar에서 멈춤.
+    # predicate(indices, profitloss) : 진행할 bar의 index/손익 배열을 받아 멈출 bar를 True로 표시한 bool 배열을 반환
+    # HOLD 동안 잔고/보유량이 고정이므로 구간의 포트폴리오 가치는 종가 배열로 한 번에 계산하고, 멈출 bar만 step(Action.HOLD)로 수행.
+    # 반환값과 계좌 상태는 같은 구간을 step(Action.HOLD)로 한 bar씩 진행한 결과와 동일 (진행한 bar 수는 env.idx 변화로 확인)
+    def step_until(self, predicate=None, n_steps=None):
+        last = self.end_idx if n_steps is None else min(self.idx + 1 + max(n_steps, 1), self.end_idx)
+        start = self.idx + 1
+        # 마지막 bar(last - 1)는 어차피 step으로 수행하므로 그 이전 bar만 검사
+        stop = max(last - 1, start)
+        chunk = self.FAST_FORWARD_CHUNK
+        quantity = abs(self.num_stocks)
+        threshold = self.initial_balance*0.20
+        while start < stop:
+            end = min(start + chunk, stop)
+            prices = self.prices[start:end]
+            # act의 (5) 포트폴리오 가치 갱신과 같은 연산
+            if self.position == Position.SHORT:
+                portfolio_values = self.balance + (2*self.avg_position_price - prices) * quantity
+            else:
+                portfolio_values = self.balance + prices * quantity
+            hit = portfolio_values < threshold
+            if predicate is not None:
+                hit |= np.asarray(predicate(np.arange(start, end), portfolio_values / self.initial_balance -1), dtype=bool)
+            hits = np.flatnonzero(hit)
+            if len(hits):
+                stop = start + int(hits[0])
+                break
+            start = end
+            chunk *= 2
+
+        # 건너뛴 bar는 HOLD 횟수만 반영하고, 멈출 bar에서 step 수행 (데이터가 없으면 step과 동일하게 종료 처리)
+        if stop > self.idx + 1:
+            self.num_hold += stop - (self.idx + 1)
+            self.idx = stop - 1
+        return self.step(Action.HOLD, self.HOLD_POLICY)
+
+
+class ProfiledEnvironment(Environment):
+    """
+    Environment.step의 단계별 시간과 nan confidence 횟수를 metrics에 집계하는 Environment.
+    timer : env.step, env.observe, env.validate_action, env.act(validate_action 포함), env.state(chart state 생성),
+            env.step_until(마지막 bar의 env.step 포함)
+    counter : env.nan_confidence
+    계측이 필요 없을 때는 Environment를 그대로 사용하면 되므로 기본 경로에는 추가 비용이 없음.
+    """
+    __slots__ = ('metrics',)
+
+    def __init__(self, *args, metrics:Metrics=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = metrics if metrics is not None else Metrics()
+
+    def observe(self):
+        start = time.perf_counter()
+        observation = super().observe()
+        self.metrics.add_time('env.observe', time.perf_counter() - start)
+        return observation
+
+    def validate_action(self, action):
+        start = time.perf_counter()
+        valid = super().validate_action(action)
+        self.metrics.add_time('env.validate_action', time.perf_counter() - start)
+        return valid
+
+    def decide_trading_unit(self, confidence):
+        if np.isnan(confidence):
+            self.metrics.incr('env.nan_confidence')
+        return super().decide_trading_unit(confidence)
+
+    def act(self, action, confidence):
+        start = time.perf_counter()
+        result = super().act(action, confidence)
+        self.metrics.add_time('env.act', time.perf_counter() - start)
+        return result
+
+    def get_chart_state(self):
+        start = time.perf_counter()
+        chart_state = super().get_chart_state()
+        self.metrics.add_time('env.state', time.perf_counter() - start)
+        return chart_state
+
+    def step(self, action=None, policy=None):
+        start = time.perf_counter()
+        result = super().step(action, policy)
+        self.metrics.add_time('env.step', time.perf_counter() - start)
+        self.metrics.maybe_export()
+        return result
+
+    def step_until(self, predicate=None, n_steps=None):
+        start = time.perf_counter()
+        result = super().step_until(predicate, n_steps)
+        self.metrics.add_time('env.step_until', time.perf_counter() - start)
+        return result
+
+
+class VectorEnvironment():
+    # N개의 episode를 struct-of-arrays로 동시에 진행하는 Environment.
+    # 각 env의 계산 결과는 동일한 입력의 Environment와 정확히 일치해야 함.
+    B_STATE_DIM = Environment.B_STATE_DIM
+    NUM_ACTIONS = Environment.NUM_ACTIONS
+    CLOSE_PRICE_IDX = Environment.CLOSE_PRICE_IDX
+
+    def __init__(self, chart_data, training_data, initial_balance, min_trading_budget, max_trading_budget, num_envs, window_size=None,
+                 valid_starts=None):
+        self.num_envs = num_envs
+        self.initial_balance = initial_balance
+        self.min_trading_budget = min_trading_budget
+        self.max_trading_budget = max_trading_budget
+
+        # chart 정보 : 종가는 1-D 배열로 한 번만 변환
+        self.chart_data, self.prices, self.training_data = to_contiguous_arrays(chart_data, training_data, self.CLOSE_PRICE_IDX)
+        self.idx = np.full(num_envs, -1, dtype=np.int64)
+        self.start_idx = np.zeros(num_envs, dtype=np.int64)
+        self.end_idx = np.full(num_envs, len(self.prices), dtype=np.int64)
+        self.valid_starts = None if valid_starts is None else np.asarray(valid_starts, dtype=np.int64)
+        self.window_size = window_size
+        self.windows = LookbackWindows(self.training_data, window_size) if window_size else None
+
+        # balance : 잔고 내역 및 거래 정보
+        self.balance = np.full(num_envs, initial_balance, dtype=np.float64)
+        self.num_stocks = np.zeros(num_envs, dtype=np.float64)
+        self.portfolio_value = np.zeros(num_envs, dtype=np.float64)
+        self.num_long = np.zeros(num_envs, dtype=np.int64)
+        self.num_short = np.zeros(num_envs, dtype=np.int64)
+        self.num_hold = np.zeros(num_envs, dtype=np.int64)
+
+        # balance : agent의 state 정보
+        self.hold_ratio = np.zeros(num_envs, dtype=np.float64)
+        self.profitloss = np.zeros(num_envs, dtype=np.float64)
+        self.avg_position_price = np.zeros(num_envs, dtype=np.float64)
+        self.position = np.full(num_envs, Position.NONE, dtype=np.int64)
+
+    # env_ids가 주어지면 해당 env만 초기화 (종료된 episode의 auto-reset 용도)
+    # start_idx, length, rng : Environment.reset과 동일 (start_idx는 scalar 또는 env_ids 별 배열)
+    def reset(self, env_ids=None, start_idx=None, length=None, rng=None):
+        env_ids = np.arange(self.num_envs)[slice(None) if env_ids is None else env_ids]
+        if start_idx is None:
+            start_idx = self.sample_start(rng, np.size(env_ids), length) if rng is not None else 0
+        self.start_idx[env_ids] = start_idx
+        self.end_idx[env_ids] = len(self.prices) if length is None else np.minimum(self.start_idx[env_ids] + length, len(self.prices))
+        self.idx[env_ids] = self.start_idx[env_ids] - 1
+        self.balance[env_ids] = self.initial_balance
+        self.num_stocks[env_ids] = 0
+        self.hold_ratio[env_ids] = 0.0
+        self.profitloss[env_ids] = 0.0
+        self.avg_position_price[env_ids] = 0.0
+        self.position[env_ids] = Position.NONE
+        self.num_long[env_ids] = 0
+        self.num_short[env_ids] = 0
+        self.num_hold[env_ids] = 0
+
+    # env별 상태 배열의 복사본 : {속성 이름 : (N,) 배열}
+    def snapshot(self):
+        return {name: getattr(self, name).copy() for name in ACCOUNT_STATE if name != 'observation'}
+
+    def restore(self, snapshot):
+        for name, value in snapshot.items():
+            getattr(self, name)[...] = value
+
+    def sample_start(self, rng, size, length=None):
+        if self.valid_starts is not None:
+            return self.valid_starts[rng.integers(len(self.valid_starts), size=size)]
+        last = len(self.prices) - (length if length is not None else 2)
+        return rng.integers(0, max(last, 0) + 1, size=size)
+
+    # episode 구간 안에서 다음 데이터가 있는 env만 한 칸 전진. 반환값 : 관측에 성공한 env mask
+    def observe(self):
+        alive = self.idx + 1 < self.end_idx
+        self.idx[alive] += 1
+        return alive
+
+    def get_price(self):
+        return self.prices[self.idx]
+
+    # (N, n_features) 또는 window_size 설정시 (N, window_size, n_features)
+    def get_chart_state(self):
+        if self.windows is not None:
+            return self.windows.take(self.idx)
+        return self.training_data[self.idx]
+
+    def validate_action(self, actions):
+        threshold = self.min_trading_budget * (1 + FEE.TRADING + FEE.SLIPPAGE)
+        # 반대 포지션 보유시 : Position Value로 확인 / 그 외 : Balance로 확인
+        long_ok = np.where(self.position == Position.SHORT, self.portfolio_value >= threshold, self.balance >= threshold)
+        short_ok = np.where(self.position == Position.LONG, self.portfolio_value >= threshold, self.balance >= threshold)
+        return np.where(actions == Action.LONG, long_ok, np.where(actions == Action.SHORT, short_ok, True))
+
+    def decide_trading_unit(self, confidences):
+        curr_price = self.get_price()
+        spread = self.max_trading_budget - self.min_trading_budget
+        added_trading_budget = np.maximum(np.minimum(confidences*spread, spread), 0)
+        trading_budget = self.min_trading_budget + added_trading_budget
+        trading_unit = np.where(np.isnan(confidences), self.min_trading_budget/curr_price, trading_budget/curr_price)
+        return np.round(np.maximum(trading_unit, 0), 4)
+
+    # Environment.act의 분기를 mask 연산으로 수행.
+    # Input : (actions, confidences, mask), Output : (reward(self.profitloss), trading_unit)
+    def act(self, actions, confidences, mask=None):
+        if mask is None:
+            mask = np.ones(self.num_envs, dtype=bool)
+        actions = np.where(self.validate_action(actions), actions, Action.HOLD)
+        curr_price = self.get_price()
+        buy_fee = 1 + FEE.TRADING + FEE.SLIPPAGE
+        cover_fee = 1 + (FEE.TRADING + FEE.SLIPPAGE)
+        sell_fee = 1 - (FEE.TRADING + FEE.SLIPPAGE)
+
+        balance, num_stocks, avg_price = self.balance, self.num_stocks, self.avg_position_price
+        trading_unit = np.zeros(self.num_envs, dtype=np.float64)
+        decided_unit = self.decide_trading_unit(confidences)
+
+        is_hold = mask & (actions == Action.HOLD)
+        is_long = mask & (actions == Action.LONG)
+        is_short = mask & (actions == Action.SHORT)
+        self.num_hold += is_hold
+
+        # (1) 신규/추가 진입 : (NONE, LONG|SHORT), (LONG, LONG), (SHORT, SHORT)
+        m_open = (self.position == Position.NONE) & (is_long | is_short)
+        m_add = ((self.position == Position.LONG) & is_long) | ((self.position == Position.SHORT) & is_short)
+        m_entry = m_open | m_add
+        if m_entry.any():
+            unit = decided_unit
+            remain_balance = balance - (curr_price * buy_fee * unit)
+            possible_budget = np.minimum(balance, self.max_trading_budget)
+            unit = np.where(remain_balance < 0, np.round(possible_budget/(curr_price * buy_fee), 4), unit)
+            trading_budget = curr_price * buy_fee * unit
+            done_entry = m_entry & (trading_budget > 0)
+            trading_unit = np.where(m_entry, unit, trading_unit)
+
+            abs_stocks = np.abs(num_stocks)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                added_avg = (avg_price * abs_stocks + curr_price * unit) / (abs_stocks + unit)
+            new_avg = np.where(m_open, curr_price, added_avg)
+            new_stocks = np.where(is_long, num_stocks + unit, num_stocks - unit)
+
+            self.avg_position_price = avg_price = np.where(done_entry, new_avg, avg_price)
+            self.balance = balance = np.where(done_entry, balance - trading_budget, balance)
+            self.num_stocks = num_stocks = np.where(done_entry, new_stocks, num_stocks)
+            self.num_long += done_entry & is_long
+            self.num_short += done_entry & is_short
+
+        # (2) Position : LONG, Action : SHORT -> 보유 물량 매도(+ 초과분 공매도)
+        m_flip_short = (self.position == Position.LONG) & is_short
+        if m_flip_short.any():
+            unit = decided_unit
+            remain_unit = num_stocks - unit
+            over = remain_unit < 0
+            asset_sell_amount = curr_price * sell_fee * num_stocks
+            remain_balance = balance + asset_sell_amount - (curr_price * buy_fee) * np.abs(remain_unit)
+            possible_budget = np.minimum(balance + asset_sell_amount, self.max_trading_budget)
+            unit = np.where(over & (remain_balance < 0), np.round(possible_budget / (curr_price * buy_fee), 4), unit)
+            trading_budget = np.where(over, curr_price * buy_fee * unit, curr_price * sell_fee * unit)
+            new_balance = np.where(over, balance + asset_sell_amount - trading_budget, balance + trading_budget)
+            trading_unit = np.where(m_flip_short, unit, trading_unit)
+            self.balance = balance = np.where(m_flip_short, new_balance, balance)
+
+            done_flip = m_flip_short & (trading_budget > 0)
+            new_stocks = num_stocks - unit
+            new_avg = np.where(new_stocks > 0, avg_price, np.where(new_stocks < 0, curr_price, 0))
+            self.num_stocks = num_stocks = np.where(done_flip, new_stocks, num_stocks)
+            self.avg_position_price = avg_price = np.where(done_flip, new_avg, avg_price)
+            self.num_short += done_flip
+
+        # (3) Position : SHORT, Action : LONG -> 공매도 물량 매수(+ 초과분 롱 진입)
+        m_flip_long = (self.position == Position.SHORT) & is_long
+        if m_flip_long.any():
+            unit = decided_unit
+            remain_unit = num_stocks + unit
+            over = remain_unit > 0
+            asset_buy_amount = (2*avg_price - curr_price) * sell_fee * np.abs(num_stocks)
+            remain_balance = balance + asset_buy_amount - (curr_price * cover_fee * remain_unit)
+            possible_budget = np.minimum(balance + asset_buy_amount, self.max_trading_budget)
+            unit = np.where(over & (remain_balance < 0), np.round(possible_budget / (curr_price * cover_fee), 4), unit)
+            trading_budget = curr_price * cover_fee * unit
+            partial_buy_amount = (2*avg_price - curr_price) * sell_fee * unit
+            new_balance = np.where(over, balance + asset_buy_amount - trading_budget, balance + partial_buy_amount)
+            trading_unit = np.where(m_flip_long, unit, trading_unit)
+            self.balance = balance = np.where(m_flip_long, new_balance, balance)
+
+            done_flip = m_flip_long & (trading_budget > 0)
+            new_stocks = num_stocks + unit
+            new_avg = np.where(new_stocks < 0, avg_price, np.where(new_stocks > 0, curr_price, 0))
+            self.num_stocks = num_stocks = np.where(done_flip, new_stocks, num_stocks)
+            self.avg_position_price = avg_price = np.where(done_flip, new_avg, avg_price)
+            self.num_long += done_flip
+
+        # (4) 포지션 업데이트
+        position = np.where(num_stocks > 0, Position.LONG, np.where(num_stocks < 0, Position.SHORT, Position.NONE))
+        self.position = np.where(mask, position, self.position)
+
+        # (5) 포트폴리오 가치 갱신
+        portfolio_value = np.where(self.position == Position.SHORT,
+                                   balance + (2*avg_price - curr_price) * np.abs(num_stocks),
+                                   balance + curr_price * np.abs(num_stocks))
+        self.portfolio_value = np.where(mask, portfolio_value, self.portfolio_value)
+
+        # (6) 손익 갱신 / (7) 포지션 보유 비율 갱신
+        self.profitloss = np.where(mask, self.portfolio_value / self.initial_balance - 1, self.profitloss)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            hold_ratio = (self.portfolio_value - self.balance) / self.portfolio_value
+        self.hold_ratio = np.where(mask, hold_ratio, self.hold_ratio)
+        return self.profitloss, trading_unit
+
+    # Input : (N,) actions, (N, NUM_ACTIONS) policies | Output : (Chart, Balance, Reward, Done, Trading Unit) 배열
+    def step(self, actions=None, policies=None):
+        alive = self.observe()
+        chart_next_state = self.get_chart_state()
+
+        # 훈련 시작 전 초기 데이터 반환
+        if actions is None:
+            avg_return = np.zeros(self.num_envs, dtype=np.float64)
+            balance_next_state = np.stack([self.hold_ratio, self.profitloss, avg_return, self.position], axis=1)
+            return chart_next_state, balance_next_state, np.zeros(self.num_envs), ~alive, None
+
+        actions = np.asarray(actions)
+        confidences = np.asarray(policies, dtype=np.float64)[np.arange(self.num_envs), actions]
+        reward, trading_unit = self.act(actions, confidences, mask=alive)
+        reward = np.where(alive, reward, 0)
+
+        # 현재 종가 대비 평균 수익률
+        curr_price = self.get_price()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            avg_return = np.where(self.position == Position.LONG, (curr_price / self.avg_position_price) - 1,
+                                  np.where(self.position == Position.SHORT, 1 - (self.avg_position_price / curr_price), 0))
+        balance_next_state = np.stack([self.hold_ratio, self.profitloss, avg_return, self.position], axis=1)
+
+        # 데이터 소진 or 원금 대비 -80% 손실 나면 epoch 종료
+        done = ~alive | (self.portfolio_value < self.initial_balance*0.20)
+        return chart_next_state, balance_next_state, reward, done, trading_unit
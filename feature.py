@@ -0,0 +1,182 @@
+import os
+import hashlib
+import orjson
+import numpy as np
+
+from typing import Dict, List, Union
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+# 기본 feature 설정 : {feature 종류 : [기간(캔들 수)]}
+DEFAULT_CONFIG = {'returns': [1, 4, 24],
+                  'ma_ratio': [6, 24, 72],
+                  'volatility': [24, 72],
+                  'volume_ratio': [24]}
+
+
+def rolling(values:np.ndarray, window:int, func) -> np.ndarray:
+    # 길이 window의 strided view 위에서 func(view, axis=1) 계산. 앞쪽 window-1 개는 NaN
+    out = np.full(len(values), np.nan)
+    if len(values) >= window:
+        out[window - 1:] = func(sliding_window_view(values, window), axis=1)
+    return out
+
+
+def shifted_ratio(values:np.ndarray, period:int) -> np.ndarray:
+    # values[t] / values[t - period]
+    out = np.full(len(values), np.nan)
+    out[period:] = values[period:] / values[:-period]
+    return out
+
+
+def lookback_windows(training_data:np.ndarray, window_size:int) -> np.ndarray:
+    """
+    (T, F) -> (T - window_size + 1, window_size, F) 복사 없는 view.
+    결과의 i번째 원소는 training_data[i : i + window_size] (즉 시점 i + window_size - 1 까지의 lookback)
+    """
+    return sliding_window_view(training_data, window_size, axis=0).transpose(0, 2, 1)
+
+
+class LookbackWindows:
+    """
+    training_data (T, F)에 대한 시점별 (window_size, F) lookback view.
+    데이터 시작 부분(idx < window_size - 1)은 앞을 0으로 채운 작은 head 배열의 view를 사용하므로
+    전체 데이터를 복사/패딩하지 않음. mask(idx)는 실제 데이터 위치만 True.
+    """
+    def __init__(self, training_data:np.ndarray, window_size:int) -> None:
+        self.window_size = window_size
+        self.num_rows, num_features = training_data.shape
+        pad = window_size - 1
+        empty = np.empty((0, window_size, num_features), dtype=training_data.dtype)
+        self.windows = lookback_windows(training_data, window_size) if self.num_rows >= window_size else empty
+        head = np.concatenate([np.zeros((pad, num_features), dtype=training_data.dtype), training_data[:pad]])
+        self.head_windows = lookback_windows(head, window_size) if len(head) >= window_size else empty
+        # masks[k] : 유효한 과거 데이터가 k + 1개일 때의 mask
+        self.masks = np.arange(window_size)[None, :] >= (pad - np.arange(window_size))[:, None]
+
+    def __len__(self) -> int:
+        return self.num_rows
+
+    def __getitem__(self, idx:int) -> np.ndarray:
+        if idx < self.window_size - 1:
+            return self.head_windows[idx]
+        return self.windows[idx - self.window_size + 1]
+
+    def take(self, indices:np.ndarray, out:np.ndarray=None) -> np.ndarray:
+        # 여러 시점의 window를 (batch, window_size, F) 배열로 한 번에 수집 (out이 주어지면 재사용)
+        indices = np.asarray(indices)
+        if out is None:
+            out = np.empty((len(indices),) + self.windows.shape[1:], dtype=self.windows.dtype)
+        head = indices < self.window_size - 1
+        if head.any():
+            out[head] = self.head_windows[indices[head]]
+            out[~head] = self.windows[indices[~head] - self.window_size + 1]
+        else:
+            np.take(self.windows, indices - self.window_size + 1, axis=0, out=out)
+        return out
+
+    def mask(self, idx:Union[int, np.ndarray]) -> np.ndarray:
+        return self.masks[np.minimum(idx, self.window_size - 1)]
+
+
+class FeaturePipeline:
+    """
+    캔들 컬럼(CandleColumns / DataFrame)으로부터 Environment의 training_data (T, F) float32 배열 생성.
+    모든 feature는 시점 t의 값이 [t - warmup, t] 구간에만 의존하므로, 새 캔들만 증분 계산해도 전체 계산과 동일함.
+    build()는 결과를 cache_dir에 feature 설정 + 데이터 구간의 hash로 캐싱.
+    """
+    def __init__(self, config:Dict[str, List[int]]=None, cache_dir:str='./data/features') -> None:
+        self.config = config if config is not None else DEFAULT_CONFIG
+        self.cache_dir = cache_dir
+
+    @property
+    def feature_names(self) -> List[str]:
+        return [f'{name}_{period}' for name, periods in self.config.items() for period in periods]
+
+    @property
+    def warmup(self) -> int:
+        # 모든 feature가 유효해지는 첫 index (이전 구간은 0으로 채워짐)
+        lookbacks = [0]
+        for name, periods in self.config.items():
+            for period in periods:
+                lookbacks.append(period if name in ('returns', 'volatility') else period - 1)
+        return max(lookbacks)
+
+    def compute(self, candles) -> np.ndarray:
+        close = np.asarray(candles['Close'], dtype=np.float64)
+        volume = np.asarray(candles['Volume'], dtype=np.float64)
+        features = []
+        with np.errstate(divide='ignore', invalid='ignore'):
+            log_return = np.concatenate([[np.nan], np.log(close[1:] / close[:-1])])
+            for name, periods in self.config.items():
+                for period in periods:
+                    if name == 'returns':
+                        features.append(shifted_ratio(close, period) - 1)
+                    elif name == 'ma_ratio':
+                        features.append(close / rolling(close, period, np.mean) - 1)
+                    elif name == 'volatility':
+                        features.append(rolling(log_return, period, np.std))
+                    elif name == 'volume_ratio':
+                        features.append(volume / rolling(volume, period, np.mean))
+                    else:
+                        raise ValueError(f'unknown feature : {name}')
+        training_data = np.stack(features, axis=1) if features else np.empty((len(close), 0))
+        return np.nan_to_num(training_data, nan=0.0, posinf=0.0, neginf=0.0).astype(np.float32)
+
+    def cache_key(self, symbol:str, interval:str, first_open_time:int) -> str:
+        key = orjson.dumps({'config': self.config, 'symbol': symbol, 'interval': interval, 'start': first_open_time},
+                           option=orjson.OPT_SORT_KEYS)
+        return hashlib.sha1(key).hexdigest()[:16]
+
+    def build(self, candles, symbol:str, interval:str) -> np.ndarray:
+        """
+        캐시된 feature가 있으면 불러오고, 캐시 이후 추가된 캔들만 계산해 이어 붙임.
+        """
+        open_time = np.asarray(candles['Open time'], dtype=np.int64)
+        if len(open_time) == 0:
+            return self.compute(candles)
+
+        key = self.cache_key(symbol, interval, int(open_time[0]))
+        data_path, meta_path = os.path.join(self.cache_dir, f'{key}.npy'), os.path.join(self.cache_dir, f'{key}.json')
+        cached = self.load_cache(data_path, meta_path, open_time)
+
+        # (1) 캐시 없음 -> 전체 계산 / (2) 캐시가 최신 -> 그대로 / (3) 새 캔들만 lookback 구간과 함께 계산
+        if cached is None:
+            training_data = self.compute(candles)
+        elif len(cached) == len(open_time):
+            return cached
+        else:
+            start = max(len(cached) - self.warmup, 0)
+            tail = {column: np.asarray(candles[column])[start:] for column in ('Close', 'Volume')}
+            new_data = self.compute(tail)[len(cached) - start:]
+            training_data = np.concatenate([cached, new_data])
+
+        self.save_cache(data_path, meta_path, training_data, int(open_time[-1]))
+        return training_data
+
+    def load_cache(self, data_path:str, meta_path:str, open_time:np.ndarray) -> Union[np.ndarray, None]:
+        if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+            return None
+        with open(meta_path, 'rb') as f:
+            meta = orjson.loads(f.read())
+        # 캐시 구간이 현재 데이터에 그대로 포함되는지 확인 (데이터가 수정/축소되었으면 재계산)
+        num_rows = meta['num_rows']
+        if num_rows > len(open_time) or open_time[num_rows - 1] != meta['last_open_time']:
+            return None
+        return np.load(data_path)
+
+    def save_cache(self, data_path:str, meta_path:str, training_data:np.ndarray, last_open_time:int) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        np.save(f'{data_path}.tmp.npy', training_data)
+        os.replace(f'{data_path}.tmp.npy', data_path)
+        with open(f'{meta_path}.tmp', 'wb') as f:
+            f.write(orjson.dumps({'num_rows': len(training_data), 'last_open_time': last_open_time,
+                                  'features': self.feature_names, 'config': self.config}))
+        os.replace(f'{meta_path}.tmp', meta_path)
+
+
+def load_training_data(store, symbol:str, interval:str, pipeline:FeaturePipeline=None) -> tuple:
+    # CandleStore -> (chart_data(CandleColumns), training_data) : Environment 생성 인자
+    pipeline = pipeline if pipeline is not None else FeaturePipeline()
+    chart_data = store.load(symbol, interval)
+    return chart_data, pipeline.build(chart_data, symbol, interval)
@@ -0,0 +1,81 @@
+import time
+
+from contextlib import nullcontext
+from typing import Callable, Dict
+
+
+class Timer:
+    # with metrics.timer(name): ... 구간의 경과 시간을 metrics에 기록
+    __slots__ = ('metrics', 'name', 'start')
+
+    def __init__(self, metrics:'Metrics', name:str) -> None:
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self) -> 'Timer':
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.metrics.add_time(self.name, time.perf_counter() - self.start)
+
+
+# metrics가 없을 때 사용하는 빈 context manager
+NULL_TIMER = nullcontext()
+
+
+class Metrics:
+    """
+    이름별 timer(횟수, 누적/최대 시간)와 counter를 집계하는 계측기.
+    계측 대상(ProfiledEnvironment, RestClient 등)은 metrics가 주어진 경우에만 기록하므로 비활성 시 비용이 거의 없음.
+
+    export_fn이 주어지면 maybe_export() 호출 시 export_interval초마다 집계 결과를 넘기고 초기화함.
+    metrics = Metrics(export_fn=lambda stats: logger.info(stats), export_interval=60)
+    """
+    def __init__(self, export_fn:Callable[[dict], None]=None, export_interval:float=60.0) -> None:
+        self.export_fn = export_fn
+        self.export_interval = export_interval
+        self.reset()
+
+    def reset(self) -> None:
+        # timers[name] : [횟수, 누적 시간, 최대 시간]
+        self.timers : Dict[str, list] = {}
+        self.counters : Dict[str, int] = {}
+        self.last_export = time.perf_counter()
+
+    def add_time(self, name:str, seconds:float) -> None:
+        timer = self.timers.get(name)
+        if timer is None:
+            self.timers[name] = [1, seconds, seconds]
+            return
+        timer[0] += 1
+        timer[1] += seconds
+        if seconds > timer[2]:
+            timer[2] = seconds
+
+    def incr(self, name:str, value:int=1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def timer(self, name:str) -> Timer:
+        return Timer(self, name)
+
+    def summary(self) -> dict:
+        """
+        {'elapsed' : 집계 구간(초),
+         'timers' : {name : {'count', 'total', 'mean', 'max'}},
+         'counters' : {name : value}}
+        """
+        timers = {name: {'count': count, 'total': total, 'mean': total / count, 'max': max_time}
+                  for name, (count, total, max_time) in sorted(self.timers.items())}
+        return {'elapsed': time.perf_counter() - self.last_export, 'timers': timers, 'counters': dict(sorted(self.counters.items()))}
+
+    def export(self) -> dict:
+        stats = self.summary()
+        self.reset()
+        if self.export_fn is not None:
+            self.export_fn(stats)
+        return stats
+
+    def maybe_export(self) -> None:
+        if self.export_fn is not None and time.perf_counter() - self.last_export >= self.export_interval:
+            self.export()
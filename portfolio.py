@@ -0,0 +1,222 @@
+import numpy as np
+
+from typing import Dict, List
+
+from environment import Position, FEE, Action, Environment
+from feature import FeaturePipeline
+
+
+def align_candles(candles:Dict[str, object]) -> tuple:
+    """
+    symbol별 캔들(CandleColumns / DataFrame)을 Open time 합집합 기준 (T, n_symbols) 배열로 정렬.
+    Output : (symbols, open_time (T,), prices (T, S), tradable (T, S), rows (T, S))
+      prices   : 해당 시점 캔들이 없으면 직전 종가로 채움 (상장 전은 NaN)
+      tradable : 실제 캔들이 있는 시점만 True (없는 시점은 HOLD 처리)
+      rows     : symbol별 원본 index (캔들이 없으면 -1)
+    """
+    symbols = list(candles)
+    open_times = [np.asarray(candles[symbol]['Open time'], dtype=np.int64) for symbol in symbols]
+    open_time = np.unique(np.concatenate(open_times)) if symbols else np.empty(0, dtype=np.int64)
+
+    rows = np.full((len(open_time), len(symbols)), -1, dtype=np.int64)
+    for j, times in enumerate(open_times):
+        rows[np.searchsorted(open_time, times), j] = np.arange(len(times))
+
+    # 원본 index는 시간순으로 증가하므로 누적 최대값 = 직전 캔들의 index
+    last_rows = np.maximum.accumulate(rows, axis=0) if len(open_time) else rows
+    prices = np.full(rows.shape, np.nan)
+    for j, symbol in enumerate(symbols):
+        close = np.asarray(candles[symbol]['Close'], dtype=np.float64)
+        listed = last_rows[:, j] >= 0
+        prices[listed, j] = close[last_rows[listed, j]]
+    return symbols, open_time, prices, rows >= 0, rows
+
+
+def stack_features(features:Dict[str, np.ndarray], symbols:List[str], rows:np.ndarray) -> np.ndarray:
+    # symbol별 training data (T_s, F) -> (T, S, F). 캔들이 없는 시점은 0
+    num_features = features[symbols[0]].shape[1]
+    stacked = np.zeros(rows.shape + (num_features,), dtype=np.float32)
+    for j, symbol in enumerate(symbols):
+        exists = rows[:, j] >= 0
+        stacked[exists, j] = features[symbol][rows[exists, j]]
+    return stacked
+
+
+def load_portfolio_data(store, symbols:List[str], interval:str, pipeline:FeaturePipeline=None) -> tuple:
+    # CandleStore -> (candles, training_data (T, S, F)) : PortfolioEnvironment 생성 인자
+    pipeline = pipeline if pipeline is not None else FeaturePipeline()
+    candles = {symbol: store.load(symbol, interval) for symbol in symbols}
+    features = {symbol: pipeline.build(chart_data, symbol, interval) for symbol, chart_data in candles.items()}
+    _, _, _, _, rows = align_candles(candles)
+    return candles, stack_features(features, symbols, rows)
+
+
+class PortfolioEnvironment():
+    """
+    여러 symbol을 하나의 balance로 거래하는 Environment.
+    가격은 Open time 기준으로 정렬한 (T, n_symbols) 배열이며, 포지션/평균 단가/거래 횟수는 symbol별 (S,) 배열.
+    매 step의 주문은 symbol 단위 반복 없이 벡터 연산으로 처리함.
+
+    주문 처리 순서 : (1) 반대 포지션 정리 -> (2) 신규/추가 진입.
+    진입 금액 합계가 (현금 + 정리 대금)을 넘으면 모든 진입 수량을 같은 비율로 줄임.
+    상장 전이거나 캔들이 빠진 시점의 symbol은 HOLD 처리하고, 평가 금액은 직전 종가로 계산.
+    """
+    B_STATE_DIM = Environment.B_STATE_DIM
+    NUM_ACTIONS = Environment.NUM_ACTIONS
+
+    def __init__(self, candles:Dict[str, object], training_data, initial_balance, min_trading_budget, max_trading_budget):
+        self.initial_balance = initial_balance
+        self.min_trading_budget = min_trading_budget
+        self.max_trading_budget = max_trading_budget
+
+        # chart 정보 : (T, S) 가격/거래 가능 여부, training data는 (T, ...) (예 : stack_features 결과 (T, S, F))
+        self.symbols, self.open_time, self.prices, self.tradable, _ = align_candles(candles)
+        # 회계용 가격 : 상장 전(NaN)은 0 (보유 수량도 0이므로 평가 금액에 영향 없음)
+        self.marks = np.nan_to_num(self.prices)
+        self.training_data = np.ascontiguousarray(training_data, dtype=np.float32)
+        self.num_symbols = len(self.symbols)
+        self.idx = -1
+        self.start_idx = 0
+        self.end_idx = len(self.prices)
+        self.reset()
+
+    def reset(self, start_idx=None, length=None, rng=None):
+        if start_idx is None:
+            start_idx = int(rng.integers(0, max(len(self.prices) - (length if length is not None else 2), 0) + 1)) if rng is not None else 0
+        self.start_idx = int(start_idx)
+        self.end_idx = len(self.prices) if length is None else min(self.start_idx + length, len(self.prices))
+        self.idx = self.start_idx - 1
+
+        # balance : 공유 현금 잔고와 symbol별 포지션
+        self.balance = float(self.initial_balance)
+        self.portfolio_value = float(self.initial_balance)
+        self.profitloss = 0.0
+        self.num_stocks = np.zeros(self.num_symbols, dtype=np.float64)
+        self.avg_position_price = np.zeros(self.num_symbols, dtype=np.float64)
+        self.position = np.full(self.num_symbols, Position.NONE, dtype=np.int64)
+        self.hold_ratio = np.zeros(self.num_symbols, dtype=np.float64)
+        self.num_long = np.zeros(self.num_symbols, dtype=np.int64)
+        self.num_short = np.zeros(self.num_symbols, dtype=np.int64)
+        self.num_hold = np.zeros(self.num_symbols, dtype=np.int64)
+
+    def observe(self):
+        if self.end_idx > self.idx + 1:
+            self.idx += 1
+            return self.prices[self.idx]
+        return None
+
+    # (S,) 현재 가격 (상장 전 symbol은 NaN)
+    def get_prices(self):
+        return self.prices[self.idx]
+
+    def get_chart_state(self):
+        return self.training_data[self.idx]
+
+    def validate_action(self, actions):
+        threshold = self.min_trading_budget * (1 + FEE.TRADING + FEE.SLIPPAGE)
+        # 반대 포지션 보유시 : Portfolio Value로 확인 / 그 외 : Balance로 확인 (Environment와 동일)
+        long_ok = np.where(self.position == Position.SHORT, self.portfolio_value >= threshold, self.balance >= threshold)
+        short_ok = np.where(self.position == Position.LONG, self.portfolio_value >= threshold, self.balance >= threshold)
+        valid = np.where(actions == Action.LONG, long_ok, np.where(actions == Action.SHORT, short_ok, True))
+        return valid & self.tradable[self.idx]
+
+    def decide_trading_unit(self, confidences):
+        curr_price = self.marks[self.idx]
+        spread = self.max_trading_budget - self.min_trading_budget
+        added_trading_budget = np.maximum(np.minimum(confidences*spread, spread), 0)
+        trading_budget = self.min_trading_budget + added_trading_budget
+        # 거래 불가능한 symbol(가격 0)의 값은 act에서 사용하지 않음
+        with np.errstate(divide='ignore', invalid='ignore'):
+            trading_unit = np.where(np.isnan(confidences), self.min_trading_budget/curr_price, trading_budget/curr_price)
+        return np.round(np.maximum(trading_unit, 0), 4)
+
+    # Input : (S,) actions, (S,) confidences | Output : (reward(self.profitloss), (S,) trading_unit)
+    def act(self, actions, confidences):
+        buy_fee = 1 + FEE.TRADING + FEE.SLIPPAGE
+        cover_fee = 1 + (FEE.TRADING + FEE.SLIPPAGE)
+        sell_fee = 1 - (FEE.TRADING + FEE.SLIPPAGE)
+        curr_price = self.marks[self.idx]
+        num_stocks, avg_price = self.num_stocks, self.avg_position_price
+
+        actions = np.where(self.validate_action(actions), actions, Action.HOLD)
+        direction = np.where(actions == Action.LONG, 1, np.where(actions == Action.SHORT, -1, 0))
+        trading_unit = np.where(direction != 0, self.decide_trading_unit(confidences), 0.0)
+
+        # (1) 반대 포지션 정리 수량 / 나머지는 신규(추가) 진입 수량
+        opposite = num_stocks * direction < 0
+        close_unit = np.where(opposite, np.minimum(trading_unit, np.abs(num_stocks)), 0.0)
+        open_unit = trading_unit - close_unit
+        # 정리 대금 : 롱 -> 매도 금액, 숏 -> (2 * 평균 단가 - 현재가) 기준 환매 금액
+        close_amount = np.where(num_stocks > 0, curr_price * sell_fee * close_unit,
+                                (2*avg_price - curr_price) * sell_fee * close_unit)
+        open_fee = np.where(opposite & (num_stocks < 0), cover_fee, buy_fee)
+        open_budget = curr_price * open_fee * open_unit
+
+        # (2) 현금 부족시 진입 수량을 같은 비율로 축소 (소수점 4자리 내림)
+        available = self.balance + close_amount.sum()
+        required = open_budget.sum()
+        if required > available:
+            scale = max(available, 0) / required
+            open_unit = np.floor(open_unit * scale * 10000) / 10000
+            open_budget = curr_price * open_fee * open_unit
+        trading_unit = close_unit + open_unit
+        self.balance = self.balance + close_amount.sum() - open_budget.sum()
+
+        # (3) 평균 단가/보유 수량 갱신 : 같은 방향 추가 -> 가중 평균, 새 방향 진입 -> 현재가, 전량 정리 -> 0
+        new_stocks = num_stocks + direction * trading_unit
+        abs_stocks = np.abs(num_stocks)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            added_avg = (avg_price * abs_stocks + curr_price * open_unit) / (abs_stocks + open_unit)
+        same_direction = num_stocks * direction > 0
+        new_avg = np.where(same_direction & (open_unit > 0), added_avg,
+                           np.where(~same_direction & (open_unit > 0), curr_price, avg_price))
+        self.avg_position_price = np.where(new_stocks == 0, 0.0, new_avg)
+        self.num_stocks = new_stocks
+
+        traded = trading_unit > 0
+        self.num_long += traded & (direction > 0)
+        self.num_short += traded & (direction < 0)
+        self.num_hold += ~traded
+
+        # (4) 포지션 업데이트
+        self.position = np.where(new_stocks > 0, Position.LONG, np.where(new_stocks < 0, Position.SHORT, Position.NONE))
+
+        # (5) 포트폴리오 가치 갱신 (캔들이 없는 symbol은 직전 종가로 평가)
+        position_value = np.where(self.position == Position.SHORT,
+                                  (2*self.avg_position_price - curr_price) * np.abs(new_stocks),
+                                  curr_price * np.abs(new_stocks))
+        self.portfolio_value = self.balance + position_value.sum()
+
+        # (6) 손익 갱신 / (7) symbol별 포지션 보유 비율 갱신
+        self.profitloss = self.portfolio_value / self.initial_balance - 1
+        self.hold_ratio = position_value / self.portfolio_value
+        return self.profitloss, trading_unit
+
+    def get_balance_state(self, avg_return):
+        # (S, B_STATE_DIM) : [포지션 보유 비율, 손익(공유), 평균 수익률, 포지션]
+        return np.stack([self.hold_ratio, np.full(self.num_symbols, self.profitloss), avg_return, self.position], axis=1)
+
+    # Input : (S,) actions, (S, NUM_ACTIONS) policies | Output : (Chart, (S, 4) Balance, Reward, Done, (S,) Trading Unit)
+    def step(self, actions=None, policies=None):
+        observation = self.observe()
+        # 다음 훈련 데이터가 없을 경우.
+        if observation is None:
+            return None, None, 0, True, None
+
+        # 훈련 시작 전 초기 데이터 반환
+        if actions is None:
+            return self.get_chart_state(), self.get_balance_state(np.zeros(self.num_symbols)), 0, False, None
+
+        actions = np.asarray(actions)
+        confidences = np.asarray(policies, dtype=np.float64)[np.arange(self.num_symbols), actions]
+        reward, trading_unit = self.act(actions, confidences)
+
+        # 현재 종가 대비 평균 수익률
+        curr_price = self.get_prices()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            avg_return = np.where(self.position == Position.LONG, (curr_price / self.avg_position_price) - 1,
+                                  np.where(self.position == Position.SHORT, 1 - (self.avg_position_price / curr_price), 0))
+
+        # 원금 대비 -80% 손실 나면 epoch 종료
+        done = self.portfolio_value < self.initial_balance*0.20
+        return self.get_chart_state(), self.get_balance_state(avg_return), reward, done, trading_unit
@@ -0,0 +1,241 @@
+import queue
+import numpy as np
+import multiprocessing as mp
+
+from multiprocessing import shared_memory
+from typing import Callable, Dict, Tuple
+
+from environment import Environment, to_contiguous_arrays
+from store import CandleColumns
+
+
+class SharedArray:
+    """
+    numpy 배열을 shared_memory에 한 번만 올리고, 다른 프로세스에서는 spec(name, shape, dtype)으로 복사 없이 attach.
+    """
+    def __init__(self, shm:shared_memory.SharedMemory, shape:tuple, dtype:np.dtype, owner:bool) -> None:
+        self.shm = shm
+        self.owner = owner
+        self.array = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+    @classmethod
+    def create(cls, shape:tuple, dtype:np.dtype) -> 'SharedArray':
+        nbytes = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+        return cls(shared_memory.SharedMemory(create=True, size=nbytes), shape, np.dtype(dtype), owner=True)
+
+    @classmethod
+    def from_array(cls, array:np.ndarray) -> 'SharedArray':
+        shared = cls.create(array.shape, array.dtype)
+        shared.array[...] = array
+        return shared
+
+    @classmethod
+    def attach(cls, spec:tuple) -> 'SharedArray':
+        name, shape, dtype = spec
+        # pool의 worker는 부모의 resource_tracker를 공유하므로 attach만으로 segment가 지워지지 않음 (unlink는 생성한 쪽에서)
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)   # Python 3.13+
+        except TypeError:
+            shm = shared_memory.SharedMemory(name=name)
+        return cls(shm, shape, np.dtype(dtype), owner=False)
+
+    @property
+    def spec(self) -> tuple:
+        return (self.shm.name, self.array.shape, self.array.dtype.str)
+
+    def close(self) -> None:
+        self.array = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class TransitionBuffer:
+    """
+    num_slots x batch_size 크기의 transition ring buffer (shared_memory).
+    worker는 빈 slot 번호를 받아 batch_size개 transition을 기록하고 slot 번호만 queue로 전달함.
+    각 행은 (s, a, r, s') : chart_state/balance_state는 action을 결정한 state, next_chart_state/next_balance_state는 step 이후 state.
+    """
+    def __init__(self, fields:Dict[str, SharedArray]) -> None:
+        self.fields = fields
+
+    @classmethod
+    def create(cls, num_slots:int, batch_size:int, chart_shape:tuple) -> 'TransitionBuffer':
+        shapes = {'chart_state': ((num_slots, batch_size) + chart_shape, np.float32),
+                  'balance_state': ((num_slots, batch_size, Environment.B_STATE_DIM), np.float64),
+                  'action': ((num_slots, batch_size), np.int64),
+                  'reward': ((num_slots, batch_size), np.float64),
+                  'next_chart_state': ((num_slots, batch_size) + chart_shape, np.float32),
+                  'next_balance_state': ((num_slots, batch_size, Environment.B_STATE_DIM), np.float64),
+                  'done': ((num_slots, batch_size), np.bool_),
+                  'trading_unit': ((num_slots, batch_size), np.float64)}
+        return cls({name: SharedArray.create(shape, dtype) for name, (shape, dtype) in shapes.items()})
+
+    @classmethod
+    def attach(cls, spec:dict) -> 'TransitionBuffer':
+        return cls({name: SharedArray.attach(field_spec) for name, field_spec in spec.items()})
+
+    @property
+    def spec(self) -> dict:
+        return {name: field.spec for name, field in self.fields.items()}
+
+    def __getitem__(self, name:str) -> np.ndarray:
+        return self.fields[name].array
+
+    def slot(self, slot:int) -> Dict[str, np.ndarray]:
+        return {name: field.array[slot] for name, field in self.fields.items()}
+
+    def close(self) -> None:
+        for field in self.fields.values():
+            field.close()
+
+
+def random_policy(rng:np.random.Generator, chart_state:np.ndarray, balance_state:tuple) -> Tuple[int, np.ndarray]:
+    # (action, policy) 반환. policy[action]이 Environment.step의 confidence로 사용됨
+    policy = rng.random(Environment.NUM_ACTIONS)
+    return int(policy.argmax()), policy
+
+
+def reset_random_start(env:Environment, rng:np.random.Generator, episode_length:int=None) -> tuple:
+    # 임의의 시작 지점(env.valid_starts)에서 episode 시작 후 초기 state 반환
+    env.reset(length=episode_length, rng=rng)
+    chart_state, balance_state, _, _, _ = env.step()
+    return chart_state, balance_state
+
+
+def rollout_worker(worker_id:int, chart_spec:tuple, training_spec:tuple, starts_spec:tuple, buffer_spec:dict, env_kwargs:dict,
+                   envs_per_worker:int, episode_length:int, policy_fn:Callable, free_slots, full_slots, stop_event, seed:int) -> None:
+    chart, training = SharedArray.attach(chart_spec), SharedArray.attach(training_spec)
+    starts = SharedArray.attach(starts_spec) if starts_spec is not None else None
+    buffer = TransitionBuffer.attach(buffer_spec)
+    rng = np.random.default_rng(seed)
+
+    valid_starts = starts.array if starts is not None else None
+    envs = [Environment(chart.array, training.array, valid_starts=valid_starts, **env_kwargs) for _ in range(envs_per_worker)]
+    states = [reset_random_start(env, rng, episode_length) for env in envs]
+    batch_size = buffer['reward'].shape[1]
+
+    try:
+        while not stop_event.is_set():
+            try:
+                slot = free_slots.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            transition = buffer.slot(slot)
+            for row in range(batch_size):
+                env_id = row % envs_per_worker
+                env = envs[env_id]
+                chart_state, balance_state = states[env_id]
+                action, policy = policy_fn(rng, chart_state, balance_state)
+                chart_next_state, balance_next_state, reward, done, trading_unit = env.step(action, policy)
+
+                transition['chart_state'][row] = chart_state
+                transition['balance_state'][row] = balance_state
+                # 데이터 소진 : done 처리 후 새 episode (next state는 0)
+                if chart_next_state is None:
+                    transition['next_chart_state'][row] = 0
+                    transition['next_balance_state'][row] = 0
+                    done, trading_unit = True, 0
+                else:
+                    transition['next_chart_state'][row] = chart_next_state
+                    transition['next_balance_state'][row] = balance_next_state
+                transition['action'][row] = action
+                transition['reward'][row] = reward
+                transition['done'][row] = done
+                transition['trading_unit'][row] = trading_unit
+
+                states[env_id] = reset_random_start(env, rng, episode_length) if done else (chart_next_state, balance_next_state)
+            full_slots.put((worker_id, slot))
+    finally:
+        # shared_memory를 닫기 전에 이를 참조하는 view(Environment, state)를 먼저 해제
+        envs = states = transition = chart_state = balance_state = chart_next_state = valid_starts = None
+        chart.close(); training.close(); buffer.close()
+        if starts is not None:
+            starts.close()
+
+
+class RolloutPool:
+    """
+    K개의 worker process가 각각 envs_per_worker개의 Environment를 임의의 시작 지점에서 실행.
+    chart/training 데이터는 shared_memory에 한 번만 올리고, transition은 shared ring buffer로 batch 단위 전달.
+    episode_length : episode 최대 길이 (None이면 데이터 끝까지), valid_starts : 시작 가능 index (environment.valid_start_indices)
+
+    with RolloutPool(chart_data, training_data, num_workers=8, ...) as pool:
+        for batch in pool.batches(100):   # batch : {'chart_state', 'action', 'reward', 'next_chart_state', ...} (batch_size, ...) view
+            ...
+    """
+    def __init__(self, chart_data, training_data, initial_balance, min_trading_budget, max_trading_budget,
+                 num_workers:int=mp.cpu_count(), envs_per_worker:int=8, batch_size:int=256, num_slots:int=None,
+                 window_size:int=None, episode_length:int=None, valid_starts:np.ndarray=None,
+                 policy_fn:Callable=random_policy, seed:int=0) -> None:
+        chart_array, _, training_array = to_contiguous_arrays(chart_data, training_data, Environment.CLOSE_PRICE_IDX)
+        if isinstance(chart_array, CandleColumns):
+            chart_array = np.column_stack([np.asarray(column, dtype=np.float64) for column in chart_array.columns.values()])
+        self.chart = SharedArray.from_array(chart_array)
+        self.training = SharedArray.from_array(training_array)
+        self.starts = SharedArray.from_array(np.asarray(valid_starts, dtype=np.int64)) if valid_starts is not None else None
+        chart_shape = (window_size,) + training_array.shape[1:] if window_size else training_array.shape[1:]
+        self.num_slots = num_slots if num_slots is not None else 2 * num_workers
+        self.buffer = TransitionBuffer.create(self.num_slots, batch_size, chart_shape)
+
+        self.env_kwargs = {'initial_balance': initial_balance,
+                           'min_trading_budget': min_trading_budget,
+                           'max_trading_budget': max_trading_budget,
+                           'window_size': window_size}
+        self.num_workers = num_workers
+        self.envs_per_worker = envs_per_worker
+        self.episode_length = episode_length
+        self.policy_fn = policy_fn
+        self.seed = seed
+        self.workers = []
+
+    def start(self) -> 'RolloutPool':
+        self.free_slots, self.full_slots = mp.Queue(), mp.Queue()
+        self.stop_event = mp.Event()
+        for slot in range(self.num_slots):
+            self.free_slots.put(slot)
+        seeds = np.random.SeedSequence(self.seed).spawn(self.num_workers)
+        for worker_id in range(self.num_workers):
+            worker = mp.Process(target=rollout_worker,
+                                args=(worker_id, self.chart.spec, self.training.spec,
+                                      self.starts.spec if self.starts is not None else None, self.buffer.spec, self.env_kwargs,
+                                      self.envs_per_worker, self.episode_length, self.policy_fn, self.free_slots, self.full_slots,
+                                      self.stop_event, seeds[worker_id].generate_state(1)[0]),
+                                daemon=True)
+            worker.start()
+            self.workers.append(worker)
+        return self
+
+    def get(self, timeout:float=None) -> Tuple[int, Dict[str, np.ndarray]]:
+        # (slot, transition batch view) 반환. 사용 후 release(slot) 필요
+        _, slot = self.full_slots.get(timeout=timeout)
+        return slot, self.buffer.slot(slot)
+
+    def release(self, slot:int) -> None:
+        self.free_slots.put(slot)
+
+    def batches(self, num_batches:int, timeout:float=None):
+        for _ in range(num_batches):
+            slot, batch = self.get(timeout)
+            try:
+                yield batch
+            finally:
+                self.release(slot)
+
+    def close(self) -> None:
+        if self.workers:
+            self.stop_event.set()
+            for worker in self.workers:
+                worker.join(timeout=5)
+                if worker.is_alive():
+                    worker.terminate()
+            self.workers = []
+        self.chart.close(); self.training.close(); self.buffer.close()
+        if self.starts is not None:
+            self.starts.close()
+
+    def __enter__(self) -> 'RolloutPool':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
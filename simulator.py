@@ -0,0 +1,175 @@
+import numpy as np
+
+from environment import Position, FEE, Action
+
+# numba가 없는 환경에서는 동일한 코드를 순수 Python/NumPy로 실행
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+
+BUY_FEE = 1 + FEE.TRADING + FEE.SLIPPAGE
+COVER_FEE = 1 + (FEE.TRADING + FEE.SLIPPAGE)
+SELL_FEE = 1 - (FEE.TRADING + FEE.SLIPPAGE)
+
+# numba는 class 속성을 읽지 못하므로 모듈 상수로 복사
+POSITION_LONG, POSITION_NONE, POSITION_SHORT = Position.LONG, Position.NONE, Position.SHORT
+ACTION_LONG, ACTION_HOLD, ACTION_SHORT = Action.LONG, Action.HOLD, Action.SHORT
+
+
+# np.round(x, 4)와 동일한 연산 (x * 10^4 -> rint -> / 10^4)
+@njit(cache=True)
+def _round_unit(x):
+    return np.rint(x * 10000.0) / 10000.0
+
+
+# Environment.decide_trading_unit과 동일
+@njit(cache=True)
+def _decide_trading_unit(confidence, curr_price, min_trading_budget, max_trading_budget):
+    if np.isnan(confidence):
+        trading_unit = min_trading_budget / curr_price
+        return _round_unit(max(trading_unit, 0.0))
+    spread = max_trading_budget - min_trading_budget
+    added_trading_budget = max(min(confidence*spread, spread), 0.0)
+    trading_budget = min_trading_budget + added_trading_budget
+    trading_unit = trading_budget / curr_price
+    return _round_unit(max(trading_unit, 0.0))
+
+
+@njit(cache=True)
+def _simulate(prices, actions, confidences, initial_balance, min_trading_budget, max_trading_budget,
+              portfolio_values, profitlosses, trading_units, positions):
+    balance = initial_balance
+    num_stocks = 0.0
+    avg_position_price = 0.0
+    portfolio_value = 0.0
+    position = POSITION_NONE
+    threshold = min_trading_budget * BUY_FEE
+
+    for t in range(prices.shape[0]):
+        curr_price = prices[t]
+        action = actions[t]
+        trading_unit = 0.0
+
+        # Action을 수행할 수 있는지 잔고 확인 : 수행할 수 없다면 HOLD (Environment.validate_action)
+        if action == ACTION_LONG:
+            if position == POSITION_SHORT:
+                if portfolio_value < threshold:
+                    action = ACTION_HOLD
+            elif balance < threshold:
+                action = ACTION_HOLD
+        elif action == ACTION_SHORT:
+            if position == POSITION_LONG:
+                if portfolio_value < threshold:
+                    action = ACTION_HOLD
+            elif balance < threshold:
+                action = ACTION_HOLD
+
+        if action != ACTION_HOLD:
+            trading_unit = _decide_trading_unit(confidences[t], curr_price, min_trading_budget, max_trading_budget)
+
+            # (1) 신규/추가 진입 : (NONE, LONG|SHORT), (LONG, LONG), (SHORT, SHORT)
+            if position == POSITION_NONE or (position == POSITION_LONG and action == ACTION_LONG) \
+                    or (position == POSITION_SHORT and action == ACTION_SHORT):
+                remain_balance = balance - (curr_price * BUY_FEE * trading_unit)
+                if remain_balance < 0:
+                    possible_budget = min(balance, max_trading_budget)
+                    trading_unit = _round_unit(possible_budget/(curr_price * BUY_FEE))
+                trading_budget = curr_price * BUY_FEE * trading_unit
+                if trading_budget > 0:
+                    if position == POSITION_NONE:
+                        avg_position_price = curr_price
+                    else:
+                        avg_position_price = (avg_position_price * abs(num_stocks) + curr_price * trading_unit) \
+                                                / (abs(num_stocks) + trading_unit)
+                    balance -= trading_budget
+                    if action == ACTION_LONG:
+                        num_stocks += trading_unit
+                    else:
+                        num_stocks -= trading_unit
+
+            # (2) Position : LONG, Action : SHORT
+            elif position == POSITION_LONG:
+                remain_unit = num_stocks - trading_unit
+                if remain_unit < 0:
+                    asset_sell_amount = (curr_price * SELL_FEE * num_stocks)
+                    remain_balance = balance + asset_sell_amount - (curr_price * BUY_FEE) * abs(remain_unit)
+                    if remain_balance < 0:
+                        possible_budget = min(balance + asset_sell_amount, max_trading_budget)
+                        trading_unit = _round_unit(possible_budget / (curr_price * BUY_FEE))
+                    trading_budget = curr_price * BUY_FEE * trading_unit
+                    balance = balance + asset_sell_amount - trading_budget
+                else:
+                    trading_budget = curr_price * SELL_FEE * trading_unit
+                    balance += trading_budget
+                if trading_budget > 0:
+                    num_stocks -= trading_unit
+                    if num_stocks < 0:
+                        avg_position_price = curr_price
+                    elif num_stocks == 0:
+                        avg_position_price = 0.0
+
+            # (3) Position : SHORT, Action : LONG
+            else:
+                remain_unit = num_stocks + trading_unit
+                if remain_unit > 0:
+                    asset_buy_amount = (2*avg_position_price - curr_price) * SELL_FEE * abs(num_stocks)
+                    remain_balance = balance + asset_buy_amount - (curr_price * COVER_FEE * remain_unit)
+                    if remain_balance < 0:
+                        possible_budget = min(balance + asset_buy_amount, max_trading_budget)
+                        trading_unit = _round_unit(possible_budget / (curr_price * COVER_FEE))
+                    trading_budget = curr_price * COVER_FEE * trading_unit
+                    balance = balance + asset_buy_amount - trading_budget
+                else:
+                    asset_buy_amount = (2*avg_position_price - curr_price) * SELL_FEE * trading_unit
+                    trading_budget = curr_price * COVER_FEE * trading_unit
+                    balance += asset_buy_amount
+                if trading_budget > 0:
+                    num_stocks += trading_unit
+                    if num_stocks > 0:
+                        avg_position_price = curr_price
+                    elif num_stocks == 0:
+                        avg_position_price = 0.0
+
+        # (4) 포지션 업데이트
+        if num_stocks > 0:
+            position = POSITION_LONG
+        elif num_stocks < 0:
+            position = POSITION_SHORT
+        else:
+            position = POSITION_NONE
+
+        # (5) 포트폴리오 가치 갱신
+        if position == POSITION_SHORT:
+            portfolio_value = balance + (2*avg_position_price - curr_price) * abs(num_stocks)
+        else:
+            portfolio_value = balance + curr_price * abs(num_stocks)
+
+        portfolio_values[t] = portfolio_value
+        profitlosses[t] = portfolio_value / initial_balance - 1
+        trading_units[t] = trading_unit
+        positions[t] = position
+
+
+# 고정된 (action, confidence) 시퀀스를 Environment.act와 동일한 회계로 한 번에 재생.
+# actions[t]는 prices[t]에서 수행됨. Output : (portfolio_value, profitloss, trading_unit, position) 배열
+def simulate(prices, actions, confidences, initial_balance, min_trading_budget, max_trading_budget):
+    prices = np.ascontiguousarray(prices, dtype=np.float64)
+    actions = np.ascontiguousarray(actions, dtype=np.int64)
+    confidences = np.ascontiguousarray(confidences, dtype=np.float64)
+
+    portfolio_values = np.empty(len(prices), dtype=np.float64)
+    profitlosses = np.empty(len(prices), dtype=np.float64)
+    trading_units = np.empty(len(prices), dtype=np.float64)
+    positions = np.empty(len(prices), dtype=np.int64)
+
+    _simulate(prices, actions, confidences, float(initial_balance), float(min_trading_budget), float(max_trading_budget),
+              portfolio_values, profitlosses, trading_units, positions)
+    return portfolio_values, profitlosses, trading_units, positions
@@ -0,0 +1,235 @@
+import io
+import os
+import glob
+import shutil
+import argparse
+import numpy as np
+import pandas as pd
+
+from typing import Dict, List, Union
+
+
+# 캔들 컬럼별 저장 타입 : 시간은 int64(ms), 가격/거래량은 float64
+CANDLE_DTYPES = {'Open time': np.int64,
+                 'Open': np.float64,
+                 'High': np.float64,
+                 'Low': np.float64,
+                 'Close': np.float64,
+                 'Volume': np.float64,
+                 'Close time': np.int64}
+
+
+# commit된 행 수를 기록하는 파일 : append 도중 중단되어 .npy에 남은 commit되지 않은 행은 읽지 않음
+LENGTH_FILENAME = 'length'
+
+# .npy header 읽기/쓰기 함수 (format version별)
+NPY_HEADER_FUNCS = {(1, 0): (np.lib.format.read_array_header_1_0, np.lib.format.write_array_header_1_0),
+                    (2, 0): (np.lib.format.read_array_header_2_0, np.lib.format.write_array_header_2_0)}
+
+
+def column_filename(column:str) -> str:
+    # 'Open time' -> 'open_time.npy'
+    return f"{column.lower().replace(' ', '_')}.npy"
+
+
+def write_length(path:str, num_rows:int) -> None:
+    # tmp 파일에 쓰고 rename 하여 행 수를 원자적으로 교체 (append의 commit 지점)
+    tmp_path = os.path.join(path, f'{LENGTH_FILENAME}.tmp')
+    with open(tmp_path, 'w') as f:
+        f.write(str(num_rows))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(path, LENGTH_FILENAME))
+
+
+def grown_npy_header(npy_path:str, num_rows:int) -> Union[tuple, None]:
+    """
+    1-D .npy 파일의 shape를 num_rows로 바꾼 header와 (data 시작 위치, dtype) 반환.
+    header 길이가 달라져 제자리에서 교체할 수 없으면 None.
+    """
+    with open(npy_path, 'rb') as f:
+        version = np.lib.format.read_magic(f)
+        if version not in NPY_HEADER_FUNCS:
+            return None
+        read_header, write_header = NPY_HEADER_FUNCS[version]
+        _, fortran_order, dtype = read_header(f)
+        offset = f.tell()
+    header = io.BytesIO()
+    write_header(header, {'descr': np.lib.format.dtype_to_descr(dtype), 'fortran_order': fortran_order, 'shape': (num_rows,)})
+    return (header.getvalue(), offset, dtype) if header.tell() == offset else None
+
+
+def sort_candle_columns(columns:Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Open time 기준 정렬 + 중복 제거 (같은 Open time은 먼저 나온 행 유지). 이미 정렬된 경우 그대로 반환.
+    """
+    open_time = np.asarray(columns['Open time'])
+    if np.all(open_time[1:] > open_time[:-1]):
+        return columns
+    order = np.argsort(open_time, kind='stable')
+    open_time = open_time[order]
+    keep = order[np.concatenate([[True], open_time[1:] != open_time[:-1]])]
+    return {column: np.asarray(values)[keep] for column, values in columns.items()}
+
+
+class CandleColumns:
+    """
+    한 symbol/interval의 컬럼별 배열 묶음 (CandleStore.load 결과).
+    columns['Close'] 처럼 컬럼 배열을, columns[idx] 처럼 한 행(tuple)을 읽을 수 있음.
+    """
+    def __init__(self, columns:Dict[str, np.ndarray]) -> None:
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(self.columns['Open time'])
+
+    def __getitem__(self, key:Union[str, int]):
+        if isinstance(key, str):
+            return self.columns[key]
+        return tuple(column[key] for column in self.columns.values())
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({column: np.asarray(values) for column, values in self.columns.items()})
+
+
+class CandleStore:
+    """
+    캔들을 컬럼별 .npy 파일로 저장하는 저장소.
+    {root}/{symbol}/{interval}/{open_time, open, high, low, close, volume, close_time}.npy
+
+    load(mmap=True)는 np.memmap으로 열기 때문에 전체 데이터를 메모리에 올리지 않음.
+    """
+    def __init__(self, root:str='./data/store') -> None:
+        self.root = root
+
+    def path(self, symbol:str, interval:str) -> str:
+        return os.path.join(self.root, symbol, interval)
+
+    def exists(self, symbol:str, interval:str) -> bool:
+        return os.path.exists(os.path.join(self.path(symbol, interval), column_filename('Open time')))
+
+    def series(self) -> List[tuple]:
+        # 저장된 (symbol, interval) 목록 (write 중 남은 {interval}.tmp / {interval}.old 디렉토리는 제외)
+        paths = glob.glob(os.path.join(self.root, '*', '*', column_filename('Open time')))
+        return sorted((os.path.basename(os.path.dirname(path)), os.path.basename(path))
+                      for path in map(os.path.dirname, paths) if '.' not in os.path.basename(path))
+
+    def num_rows(self, symbol:str, interval:str) -> int:
+        # commit된 행 수 (length 파일이 없으면 Open time 배열 길이)
+        path = self.path(symbol, interval)
+        length_path = os.path.join(path, LENGTH_FILENAME)
+        if os.path.exists(length_path):
+            with open(length_path) as f:
+                return int(f.read())
+        return len(np.load(os.path.join(path, column_filename('Open time')), mmap_mode='r'))
+
+    def write(self, symbol:str, interval:str, df:pd.DataFrame) -> None:
+        """
+        DataFrame을 타입 변환 후 컬럼별로 저장. 임시 디렉토리에 모두 쓴 뒤 디렉토리를 교체하므로 읽는 쪽은 이전 또는 새 데이터 전체를 봄.
+        (두 번의 rename 사이 짧은 순간에는 series 디렉토리가 없음)
+        """
+        path = self.path(symbol, interval)
+        tmp_path, old_path = f'{path}.tmp', f'{path}.old'
+        # 이전 write가 중단되어 남은 디렉토리 정리 (남아 있으면 os.replace가 실패함)
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        shutil.rmtree(old_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        for column, dtype in CANDLE_DTYPES.items():
+            np.save(os.path.join(tmp_path, column_filename(column)), np.ascontiguousarray(df[column], dtype=dtype))
+        write_length(tmp_path, len(df['Open time']))
+
+        if os.path.exists(path):
+            os.replace(path, old_path)
+        os.replace(tmp_path, path)
+        shutil.rmtree(old_path, ignore_errors=True)
+
+    def append(self, symbol:str, interval:str, df:pd.DataFrame) -> None:
+        """
+        새 캔들만 각 컬럼 .npy 파일 끝에 추가하고 header의 shape를 제자리에서 갱신 (기존 데이터는 다시 쓰지 않음).
+        모든 컬럼을 쓴 뒤 length 파일을 교체해 commit 하므로, 중단된 append의 행은 읽히지 않고 다음 append에서 잘려나감.
+        header 길이가 바뀌는 경우(다른 numpy로 저장된 파일 등)만 write()로 전체를 다시 저장.
+        """
+        if not self.exists(symbol, interval):
+            return self.write(symbol, interval, df)
+        path = self.path(symbol, interval)
+        num_rows, num_new = self.num_rows(symbol, interval), len(df['Open time'])
+        if num_new == 0:
+            return
+        npy_paths = {column: os.path.join(path, column_filename(column)) for column in CANDLE_DTYPES}
+        headers = {column: grown_npy_header(npy_path, num_rows + num_new) for column, npy_path in npy_paths.items()}
+        if any(header is None for header in headers.values()):
+            stored = self.load(symbol, interval, mmap=False)
+            merged = {column: np.concatenate([stored[column], np.asarray(df[column], dtype=dtype)])
+                      for column, dtype in CANDLE_DTYPES.items()}
+            return self.write(symbol, interval, merged)
+
+        for column, (header, offset, dtype) in headers.items():
+            with open(npy_paths[column], 'r+b') as f:
+                # commit된 행 바로 뒤부터 기록 (중단된 이전 append의 행은 덮어씀) -> header 갱신 -> 남은 꼬리 제거
+                # 어느 단계에서 중단되어도 파일 크기는 header의 shape 이상으로 유지됨
+                f.seek(offset + num_rows * dtype.itemsize)
+                f.write(np.ascontiguousarray(df[column], dtype=dtype).tobytes())
+                f.seek(0)
+                f.write(header)
+                f.truncate(offset + (num_rows + num_new) * dtype.itemsize)
+                f.flush()
+                os.fsync(f.fileno())
+        write_length(path, num_rows + num_new)
+
+    def load(self, symbol:str, interval:str, mmap:bool=True) -> CandleColumns:
+        path = self.path(symbol, interval)
+        mmap_mode = 'r' if mmap else None
+        num_rows = self.num_rows(symbol, interval)
+        return CandleColumns({column: np.load(os.path.join(path, column_filename(column)), mmap_mode=mmap_mode)[:num_rows]
+                              for column in CANDLE_DTYPES})
+
+    def last_close_time(self, symbol:str, interval:str) -> Union[int, None]:
+        if not self.exists(symbol, interval):
+            return None
+        num_rows = self.num_rows(symbol, interval)
+        close_time = np.load(os.path.join(self.path(symbol, interval), column_filename('Close time')), mmap_mode='r')
+        return int(close_time[num_rows - 1]) if num_rows else None
+
+
+def convert_csv(csv_path:str, store:CandleStore, symbol:str, interval:str) -> None:
+    # 기존 data/*.csv -> CandleStore
+    df = pd.read_csv(csv_path, dtype=CANDLE_DTYPES)
+    store.write(symbol, interval, df)
+
+
+def export_csv(store:CandleStore, symbol:str, interval:str, csv_path:str) -> None:
+    # CandleStore -> CSV (tmp 파일에 쓴 뒤 교체)
+    tmp_path = f'{csv_path}.tmp'
+    store.load(symbol, interval).to_frame().to_csv(tmp_path, index=False)
+    os.replace(tmp_path, csv_path)
+
+
+def parse_csv_name(csv_path:str) -> tuple:
+    # './data/btc_1h.csv' -> ('BTCUSDT', '1h')
+    name, interval = os.path.splitext(os.path.basename(csv_path))[0].rsplit('_', 1)
+    return f'{name.upper()}USDT', interval
+
+
+def csv_filename(symbol:str, interval:str) -> str:
+    # ('BTCUSDT', '1h') -> 'btc_1h.csv'
+    return f"{symbol.lower().removesuffix('usdt')}_{interval}.csv"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--csv', nargs='+', default=sorted(glob.glob('./data/*.csv')))
+    parser.add_argument('--root', default='./data/store')
+    parser.add_argument('--export', metavar='DIR', help='CSV 변환 대신 저장소의 모든 series를 DIR/btc_1h.csv 형식으로 export')
+    args = parser.parse_args()
+
+    store = CandleStore(args.root)
+    if args.export:
+        for symbol, interval in store.series():
+            csv_path = os.path.join(args.export, csv_filename(symbol, interval))
+            export_csv(store, symbol, interval, csv_path)
+            print(f'{store.path(symbol, interval)} -> {csv_path}')
+    else:
+        for csv_path in args.csv:
+            symbol, interval = parse_csv_name(csv_path)
+            convert_csv(csv_path, store, symbol, interval)
+            print(f'{csv_path} -> {store.path(symbol, interval)}')
@@ -0,0 +1,295 @@
+import time
+import asyncio
+import aiohttp
+import orjson
+import numpy as np
+from loguru import logger
+
+from typing import Dict, Union
+
+from crawler import Crawler, Endpoints, INTERVAL_MS, RequestError, split_windows, gather_or_cancel
+from environment import Environment, Action
+from feature import FeaturePipeline
+from store import CANDLE_DTYPES, CandleColumns
+
+
+class CandleRingBuffer:
+    """
+    마감된 캔들을 최근 capacity개까지 보관하는 고정 크기 컬럼 버퍼.
+    각 컬럼을 2 * capacity 크기로 만들고 같은 값을 두 위치(i, i + capacity)에 기록하므로,
+    최근 n개 구간(tail)은 항상 복사 없는 연속 view로 읽을 수 있음.
+
+    index는 지금까지 추가된 캔들의 누적 번호 (0 ~ total - 1). 최근 capacity개만 읽을 수 있음.
+    """
+    def __init__(self, capacity:int=4096) -> None:
+        self.capacity = capacity
+        self.columns = {column: np.zeros(2 * capacity, dtype=dtype) for column, dtype in CANDLE_DTYPES.items()}
+        self.total = 0
+        self.updated = asyncio.Event()
+
+    def __len__(self) -> int:
+        return min(self.total, self.capacity)
+
+    @property
+    def last_open_time(self) -> Union[int, None]:
+        return int(self.columns['Open time'][(self.total - 1) % self.capacity]) if self.total else None
+
+    @property
+    def last_close_time(self) -> Union[int, None]:
+        return int(self.columns['Close time'][(self.total - 1) % self.capacity]) if self.total else None
+
+    def append(self, row:tuple) -> None:
+        # row : (Open time, Open, High, Low, Close, Volume, Close time)
+        pos = self.total % self.capacity
+        for values, value in zip(self.columns.values(), row):
+            values[pos] = value
+            values[pos + self.capacity] = value
+        self.total += 1
+        self.notify()
+
+    def extend(self, columns) -> None:
+        # 여러 캔들(CandleColumns / DataFrame / {컬럼 : 배열})을 순서대로 추가
+        num_rows = len(columns['Open time'])
+        if num_rows == 0:
+            return
+        # capacity보다 많으면 마지막 capacity개만 남음
+        skip = max(num_rows - self.capacity, 0)
+        positions = (self.total + skip + np.arange(num_rows - skip)) % self.capacity
+        for column, values in self.columns.items():
+            new_values = np.asarray(columns[column], dtype=values.dtype)[skip:]
+            values[positions] = new_values
+            values[positions + self.capacity] = new_values
+        self.total += num_rows
+        self.notify()
+
+    def notify(self) -> None:
+        # 대기 중인 wait()를 깨우고 다음 대기용 event로 교체
+        self.updated.set()
+        self.updated = asyncio.Event()
+
+    async def wait(self, total:int) -> None:
+        # 누적 캔들 수가 total 이상이 될 때까지 대기
+        while self.total < total:
+            await self.updated.wait()
+
+    def check_index(self, idx:int) -> int:
+        if not self.total - len(self) <= idx < self.total:
+            raise IndexError(f'candle {idx} is not in buffer [{self.total - len(self)}, {self.total})')
+        return idx % self.capacity
+
+    def value(self, column:str, idx:int):
+        return self.columns[column][self.check_index(idx)]
+
+    def row(self, idx:int) -> tuple:
+        pos = self.check_index(idx)
+        return tuple(values[pos] for values in self.columns.values())
+
+    def tail(self, num_rows:int, end:int=None) -> CandleColumns:
+        """
+        index end(제외) 이전 최근 num_rows개 캔들의 view. 보관 중인 캔들이 적으면 있는 만큼만 반환.
+        """
+        end = self.total if end is None else end
+        num_rows = max(min(num_rows, end - (self.total - len(self))), 0)
+        start = (end - num_rows) % self.capacity
+        return CandleColumns({column: values[start:start + num_rows] for column, values in self.columns.items()})
+
+
+class KlineStream:
+    """
+    여러 symbol의 kline stream을 하나의 WebSocket 연결(combined stream)로 구독해 마감된 캔들을 CandleRingBuffer에 추가.
+    연결이 끊기면 backoff 후 재연결하며, 마지막 캔들 이후 빠진 구간은 Crawler(REST)로 채운 뒤 새 캔들을 추가함.
+
+    stream = KlineStream(crawler, {'BTCUSDT': CandleRingBuffer()}, '1h')
+    await stream.prefill(1000)        # REST로 최근 캔들 채우기
+    task = asyncio.create_task(stream.run())
+    """
+    def __init__(self,
+                 crawler:Crawler,
+                 buffers:Dict[str, CandleRingBuffer],
+                 interval:str,
+                 url:str=Endpoints.BINANCE_FUTURES_STREAM.value,
+                 rest_url:str=Endpoints.BINANCE_FUTURES_CANDLESTICK_API.value,
+                 limit:int=1500,
+                 heartbeat:float=30) -> None:
+        self.crawler = crawler
+        self.client = crawler.client
+        self.buffers = buffers
+        self.interval = interval
+        self.interval_ms = INTERVAL_MS[interval]
+        self.url = url
+        self.rest_url = rest_url
+        self.limit = limit
+        self.heartbeat = heartbeat
+        self.websocket = None
+        self.stopped = False
+        self.num_connections = 0
+
+    @property
+    def stream_url(self) -> str:
+        streams = '/'.join(f'{symbol.lower()}@kline_{self.interval}' for symbol in self.buffers)
+        return f'{self.url}?streams={streams}'
+
+    async def prefill(self, num_candles:int) -> None:
+        # 현재 시각 기준 최근 num_candles개의 마감된 캔들을 REST로 수집해 buffer를 채움
+        endTime = int(time.time() * 1000)
+        startTime = endTime - num_candles * self.interval_ms
+        await gather_or_cancel(*[self.backfill(symbol, startTime, endTime) for symbol in self.buffers])
+
+    async def backfill(self, symbol:str, startTime:int, endTime:int) -> None:
+        """
+        [startTime, endTime) 구간에서 마감되었고 buffer의 마지막 캔들 이후인 캔들을 REST로 수집해 추가.
+        """
+        buffer = self.buffers[symbol]
+        windows = split_windows(startTime, endTime, self.interval, self.limit)
+        df = await self.crawler.get_coin_candle_windows(self.rest_url, symbol, self.interval, windows, self.limit)
+        last_open_time = buffer.last_open_time if buffer.total else -1
+        df = df[(df['Open time'] > last_open_time) & (df['Close time'] < endTime)]
+        buffer.extend(df)
+        self.client.incr('stream.backfill_candles', len(df))
+        logger.info(f"BACKFILL | SYMBOL :{symbol}, CANDLES : {len(df)}")
+
+    async def on_message(self, data:Union[str, bytes]) -> None:
+        try:
+            kline = orjson.loads(data)['data']['k']
+        except (orjson.JSONDecodeError, KeyError, TypeError):
+            # kline이 아닌 메시지(구독 응답 등)는 무시. 빠진 캔들은 다음 마감 캔들에서 gap으로 감지되어 backfill됨
+            logger.warning(f"STREAM INVALID MESSAGE | {data[:200]}")
+            self.client.incr('stream.invalid_messages')
+            return
+        # 진행 중인 캔들(x : false)은 무시하고 마감된 캔들만 추가
+        if not kline['x']:
+            return
+        symbol, open_time = kline['s'], kline['t']
+        buffer = self.buffers[symbol]
+        if buffer.total:
+            last_open_time = buffer.last_open_time
+            # 재연결 직후 중복 수신된 캔들
+            if open_time <= last_open_time:
+                self.client.incr('stream.duplicates')
+                return
+            # 연결이 끊긴 동안 빠진 구간 : REST로 채운 뒤 추가
+            if open_time > last_open_time + self.interval_ms:
+                await self.backfill(symbol, last_open_time + self.interval_ms, open_time)
+        buffer.append((open_time, float(kline['o']), float(kline['h']), float(kline['l']), float(kline['c']),
+                       float(kline['v']), kline['T']))
+        self.client.incr('stream.candles')
+
+    async def run(self) -> None:
+        attempt = 0
+        while not self.stopped:
+            try:
+                async with next(self.client.sessions).ws_connect(self.stream_url, heartbeat=self.heartbeat) as websocket:
+                    self.websocket = websocket
+                    self.num_connections += 1
+                    logger.info(f"STREAM CONNECTED | {self.stream_url}")
+                    async for message in websocket:
+                        if message.type in (aiohttp.WSMsgType.TEXT, aiohttp.WSMsgType.BINARY):
+                            await self.on_message(message.data)
+                            attempt = 0
+                        elif message.type == aiohttp.WSMsgType.ERROR:
+                            break
+            except (aiohttp.ClientError, asyncio.TimeoutError, RequestError) as e:
+                # RequestError : 재시도 후에도 실패한 REST backfill. 재연결 후 다음 마감 캔들에서 같은 gap을 다시 채움
+                logger.warning(f"STREAM ERROR | {type(e).__name__} {e}")
+            finally:
+                self.websocket = None
+
+            if self.stopped:
+                break
+            delay = self.client.backoff(attempt)
+            attempt += 1
+            self.client.incr('stream.reconnects')
+            logger.warning(f"STREAM RECONNECT | attempt : {attempt}, delay : {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    async def stop(self) -> None:
+        self.stopped = True
+        if self.websocket is not None:
+            await self.websocket.close()
+
+
+class LiveEnvironment(Environment):
+    """
+    CandleRingBuffer에 들어오는 실시간 캔들을 관측하는 Environment (online trading).
+    idx는 buffer의 누적 캔들 index이며, observe()는 새 캔들이 있으면 가장 최근 캔들로 이동하고 없으면 None을 반환.
+    step()/step_until()은 새 캔들이 없으면 action을 수행하지 않고 (None, None, 0, False, None)을 반환.
+    pipeline이 주어지면 chart state는 최근 (warmup + window_size)개 캔들로 계산한 feature, 없으면 캔들 값 자체.
+
+    env = LiveEnvironment(buffer, 10000, 70, 1000, pipeline=FeaturePipeline())
+    await env.wait_next()
+    chart_state, balance_state, reward, done, trading_unit = env.step(action, policy)
+    """
+    __slots__ = ('buffer', 'pipeline')
+
+    def __init__(self, buffer:CandleRingBuffer, initial_balance, min_trading_budget, max_trading_budget,
+                 pipeline:FeaturePipeline=None, window_size:int=None):
+        super().__init__(buffer.tail(0), np.empty((0, 0), dtype=np.float32), initial_balance, min_trading_budget, max_trading_budget)
+        self.buffer = buffer
+        self.pipeline = pipeline
+        self.window_size = window_size
+
+    async def wait_next(self) -> None:
+        # 현재 idx 이후의 캔들이 buffer에 추가될 때까지 대기
+        await self.buffer.wait(self.idx + 2)
+
+    def observe(self):
+        if self.buffer.total > self.idx + 1:
+            self.idx = self.buffer.total - 1
+            self.observation = self.buffer.row(self.idx)
+            return self.observation
+        return None
+
+    def step(self, action=None, policy=None):
+        # 새 캔들이 없으면 action을 수행하지 않고 done=False로 반환 (episode 종료가 아니므로 wait_next() 후 다시 호출)
+        if self.buffer.total <= self.idx + 1:
+            return None, None, 0, False, None
+        return super().step(action, policy)
+
+    def step_until(self, predicate=None, n_steps=None):
+        # 실시간 캔들은 한 개씩 도착하므로 HOLD로 한 bar만 진행 (어떤 조건이든 그 bar에서 멈춤)
+        return self.step(Action.HOLD, self.HOLD_POLICY)
+
+    def get_price(self):
+        return self.buffer.value('Close', self.idx)
+
+    def get_chart_state(self):
+        num_rows = self.window_size or 1
+        if self.pipeline is None:
+            candles = self.buffer.tail(num_rows, end=self.idx + 1)
+            chart_state = np.column_stack([np.asarray(values, dtype=np.float32) for values in candles.columns.values()])
+        else:
+            chart_state = self.pipeline.compute(self.buffer.tail(self.pipeline.warmup + num_rows, end=self.idx + 1))
+        if self.window_size is None:
+            return chart_state[-1]
+        # 보관된 캔들이 window_size보다 적으면 앞을 0으로 채움 (LookbackWindows와 동일)
+        window = np.zeros((self.window_size, chart_state.shape[1]), dtype=np.float32)
+        num_rows = min(len(chart_state), self.window_size)
+        window[self.window_size - num_rows:] = chart_state[len(chart_state) - num_rows:]
+        return window
+
+
+async def trade(symbol:str, env:LiveEnvironment) -> None:
+    # 새 캔들이 마감될 때마다 state 갱신 (agent 연결 전까지는 관망)
+    env.step()
+    while True:
+        await env.wait_next()
+        chart_state, balance_state, _, _, _ = env.step()
+        logger.info(f"CANDLE | SYMBOL :{symbol}, close : {env.get_price()}, balance_state : {balance_state}")
+
+
+async def main():
+    crawler = Crawler()
+    buffers = {symbol: CandleRingBuffer() for symbol in ['BTCUSDT', 'ETHUSDT']}
+    stream = KlineStream(crawler, buffers, '1h')
+    await stream.prefill(1000)
+    envs = {symbol: LiveEnvironment(buffer, 10000, 70, 1000, pipeline=FeaturePipeline()) for symbol, buffer in buffers.items()}
+
+    try:
+        await gather_or_cancel(stream.run(), *[trade(symbol, env) for symbol, env in envs.items()])
+    finally:
+        await stream.stop()
+        await crawler.client.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
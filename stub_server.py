@@ -0,0 +1,155 @@
+import time
+import asyncio
+import orjson
+import numpy as np
+import pandas as pd
+
+from aiohttp import web
+from typing import Dict
+
+from crawler import INTERVAL_MS
+
+
+class StubKlineServer:
+    """
+    /fapi/v1/klines 를 흉내내는 로컬 HTTP 서버 (오프라인 테스트/벤치마크용).
+    저장된 캔들을 Binance와 같은 12개 필드 형식으로 반환.
+
+    /stream?streams=btcusdt@kline_1h/... 는 combined kline stream을 흉내내는 WebSocket.
+    stream_time(Open time)부터 stream_delay초마다 캔들 1개씩 진행 중(x : false) -> 마감(x : true) 메시지를 전송.
+
+    candles : {symbol : {interval : DataFrame(['Open time', 'Open', 'High', 'Low', 'Close', 'Volume', 'Close time'])}}
+    """
+    PATH = '/fapi/v1/klines'
+    STREAM_PATH = '/stream'
+
+    def __init__(self, candles:Dict[str, Dict[str, pd.DataFrame]], host:str='127.0.0.1', port:int=0) -> None:
+        self.candles = {(symbol, interval): self._to_rows(df)
+                        for symbol, by_interval in candles.items() for interval, df in by_interval.items()}
+        self.open_times = {key: np.array([row[0] for row in rows], dtype=np.int64) for key, rows in self.candles.items()}
+        self.host, self.port = host, port
+        self.num_requests = 0
+        self.used_weight, self.weight_minute = 0, 0
+        self.failures = []
+        self.runner = None
+
+        # stream 재생 상태 : 다음에 전송할 캔들의 Open time (None : 가장 이른 캔들부터)
+        self.stream_time = None
+        self.stream_delay = 0.0
+        self.disconnects = []
+        self.num_streams = 0
+
+    def inject_failures(self, status:int, count:int=1, retry_after:int=None) -> None:
+        # 다음 count개의 요청에 status 응답 (429/5xx 등 재시도 테스트용)
+        headers = {'Retry-After': str(retry_after)} if retry_after is not None else {}
+        self.failures.extend([(status, headers)] * count)
+
+    def inject_disconnect(self, after:int, skip:int=0) -> None:
+        # after개 캔들 전송 후 연결 종료. 끊긴 동안 skip개 캔들이 지나간 것으로 처리 (재연결 시 gap 발생)
+        self.disconnects.append((after, skip))
+
+    @staticmethod
+    def _to_rows(df:pd.DataFrame) -> list:
+        # 가격/거래량은 Binance와 동일하게 문자열, 시간은 정수
+        return [[int(row[0]), str(row[1]), str(row[2]), str(row[3]), str(row[4]), str(row[5]), int(row[6]),
+                 '0', 0, '0', '0', '0'] for row in df.itertuples(index=False)]
+
+    @property
+    def url(self) -> str:
+        return f'http://{self.host}:{self.port}{self.PATH}'
+
+    @property
+    def stream_url(self) -> str:
+        return f'ws://{self.host}:{self.port}{self.STREAM_PATH}'
+
+    @staticmethod
+    def _to_message(symbol:str, interval:str, row:list, closed:bool) -> str:
+        kline = {'t': row[0], 'T': row[6], 's': symbol, 'i': interval,
+                 'o': row[1], 'c': row[4], 'h': row[2], 'l': row[3], 'v': row[5], 'x': closed}
+        data = {'e': 'kline', 'E': row[6] if closed else row[0], 's': symbol, 'k': kline}
+        return orjson.dumps({'stream': f'{symbol.lower()}@kline_{interval}', 'data': data}).decode()
+
+    async def handle_stream(self, request:web.Request) -> web.WebSocketResponse:
+        websocket = web.WebSocketResponse()
+        await websocket.prepare(request)
+        keys = [tuple(stream.split('@kline_')) for stream in request.query['streams'].split('/')]
+        keys = [(symbol.upper(), interval) for symbol, interval in keys if (symbol.upper(), interval) in self.candles]
+        if not keys:
+            await websocket.close()
+            return websocket
+
+        # 새 연결이 들어오면 이전 연결의 재생은 중단 (끊긴 client 쪽 연결이 stream_time을 계속 진행시키지 않도록)
+        self.num_streams += 1
+        stream_id = self.num_streams
+        interval_ms = INTERVAL_MS[keys[0][1]]
+        if self.stream_time is None:
+            self.stream_time = min(int(self.open_times[key][0]) for key in keys)
+        last_open_time = max(int(self.open_times[key][-1]) for key in keys)
+
+        # 전송 중에도 client의 close를 바로 처리하도록 수신은 별도 task에서 진행
+        receiver = asyncio.create_task(self._drain(websocket))
+        num_sent = 0
+        while not websocket.closed and stream_id == self.num_streams and self.stream_time <= last_open_time:
+            for symbol, interval in keys:
+                open_times = self.open_times[(symbol, interval)]
+                idx = np.searchsorted(open_times, self.stream_time)
+                if idx < len(open_times) and open_times[idx] == self.stream_time:
+                    row = self.candles[(symbol, interval)][idx]
+                    await websocket.send_str(self._to_message(symbol, interval, row, closed=False))
+                    await websocket.send_str(self._to_message(symbol, interval, row, closed=True))
+            self.stream_time += interval_ms
+            num_sent += 1
+
+            if self.disconnects and num_sent >= self.disconnects[0][0]:
+                _, skip = self.disconnects.pop(0)
+                self.stream_time += skip * interval_ms
+                await websocket.close()
+                break
+            await asyncio.sleep(self.stream_delay)
+
+        # 재생이 끝나면 client가 닫을 때까지 연결 유지
+        await receiver
+        return websocket
+
+    @staticmethod
+    async def _drain(websocket:web.WebSocketResponse) -> None:
+        async for _ in websocket:
+            pass
+
+    async def handle_klines(self, request:web.Request) -> web.Response:
+        self.num_requests += 1
+        query = request.query
+        # Binance와 같이 분 단위로 사용 weight 초기화
+        if self.weight_minute != int(time.time() // 60):
+            self.used_weight, self.weight_minute = 0, int(time.time() // 60)
+        self.used_weight += 10 if int(query.get('limit', 500)) > 1000 else 5
+        headers = {'X-MBX-USED-WEIGHT-1M': str(self.used_weight)}
+        if self.failures:
+            status, failure_headers = self.failures.pop(0)
+            return web.json_response({'code': -1003, 'msg': 'injected failure'}, status=status, headers={**headers, **failure_headers})
+
+        key = (query['symbol'], query['interval'])
+        if key not in self.candles:
+            return web.json_response({'code': -1121, 'msg': 'Invalid symbol.'}, status=400, headers=headers)
+
+        rows, open_times = self.candles[key], self.open_times[key]
+        limit = int(query.get('limit', 500))
+        start = np.searchsorted(open_times, int(query['startTime'])) if 'startTime' in query else 0
+        end = np.searchsorted(open_times, int(query['endTime']), side='right') if 'endTime' in query else len(rows)
+        return web.Response(body=orjson.dumps(rows[start:min(end, start + limit)]), content_type='application/json', headers=headers)
+
+    async def start(self) -> str:
+        app = web.Application()
+        app.router.add_get(self.PATH, self.handle_klines)
+        app.router.add_get(self.STREAM_PATH, self.handle_stream)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, self.host, self.port)
+        await site.start()
+        self.port = self.runner.addresses[0][1]
+        return self.url
+
+    async def stop(self) -> None:
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
@@ -0,0 +1,14 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+# 저장소 루트의 모듈(environment, simulator, ...)을 import 할 수 있도록 경로 추가
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(scope='session')
+def btc_chart():
+    return pd.read_csv(os.path.join(ROOT, 'data', 'btc_1h.csv'))
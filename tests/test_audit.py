@@ -0,0 +1,95 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from audit import CandleAuditor, audit_open_time, is_clean
+from crawler import Crawler, RestClient, candle_path
+from store import CANDLE_DTYPES, CandleStore
+from stub_server import StubKlineServer
+
+
+HOUR = 3600000
+
+
+def repair_with_stub(store, candles, **auditor_kwargs):
+    # stub 서버를 거래소로 두고 저장소 전체를 검사/수정한 뒤 재검사 결과 반환
+    async def main():
+        server = StubKlineServer(candles)
+        await server.start()
+        client = RestClient(asyncio.get_running_loop(), max_weight_per_minute=10**9, backoff_base=0.001)
+        try:
+            return await CandleAuditor(store, Crawler(client, store=store), url=server.url, **auditor_kwargs).run()
+        finally:
+            await client.close()
+            await server.stop()
+    return {report['symbol']: report for report in asyncio.run(main())}
+
+
+def assert_same_candles(store, symbol, chart):
+    pd.testing.assert_frame_equal(store.load(symbol, '1h').to_frame(), chart.reset_index(drop=True).astype(CANDLE_DTYPES))
+
+
+def test_gaps_snap_to_interval_grid():
+    # 격자에 맞지 않는 행(2.5h) 뒤의 구간은 빠진 격자 캔들(3h)만 gap으로 보고
+    report = audit_open_time(np.array([0, HOUR, 2 * HOUR, int(2.5 * HOUR), 4 * HOUR]), HOUR)
+    assert report['misaligned'] == 1 and report['missing'] == 1
+    np.testing.assert_array_equal(report['gaps'], [[3 * HOUR, 4 * HOUR]])
+    # 빠진 격자 캔들이 없으면 gap 없음
+    report = audit_open_time(np.array([0, HOUR, int(1.5 * HOUR), 2 * HOUR, int(3.5 * HOUR)]), HOUR)
+    assert report['misaligned'] == 2 and report['missing'] == 1
+    np.testing.assert_array_equal(report['gaps'], [[3 * HOUR, 4 * HOUR]])
+    report = audit_open_time(np.array([0, HOUR, int(1.5 * HOUR), 2 * HOUR]), HOUR)
+    assert report['missing'] == 0 and len(report['gaps']) == 0
+
+
+def test_repair_round_trip(tmp_path, btc_chart):
+    chart = btc_chart.iloc[:6000]
+    rng = np.random.default_rng(0)
+    # 무작위 누락 + 연속 누락 + 중복 + 순서 뒤바뀜 (양 끝 캔들은 gap으로 감지할 수 없으므로 유지)
+    bad = chart.drop(index=rng.choice(np.arange(1, len(chart) - 1), 200, replace=False)).drop(index=range(3000, 3500), errors='ignore')
+    bad = pd.concat([bad, bad.sample(30, random_state=1)]).reset_index(drop=True)
+    bad.iloc[[1000, 1001]] = bad.iloc[[1001, 1000]].values
+    store = CandleStore(str(tmp_path / 'store'))
+    store.write('BTCUSDT', '1h', bad)
+    csv_dir = tmp_path / 'csv'
+    csv_dir.mkdir()
+    bad.to_csv(candle_path(str(csv_dir), 'BTCUSDT', '1h'), index=False)
+    assert not is_clean(CandleAuditor(store).audit('BTCUSDT', '1h'))
+
+    reports = repair_with_stub(store, {'BTCUSDT': {'1h': chart}}, csv_dir=str(csv_dir))
+    assert is_clean(reports['BTCUSDT'])
+    assert_same_candles(store, 'BTCUSDT', chart)
+    # CSV export도 수정된 내용으로 교체
+    pd.testing.assert_frame_equal(pd.read_csv(candle_path(str(csv_dir), 'BTCUSDT', '1h')).astype(CANDLE_DTYPES),
+                                  chart.reset_index(drop=True).astype(CANDLE_DTYPES))
+
+
+def test_repair_off_grid_row_and_missing_on_server(tmp_path, btc_chart):
+    chart = btc_chart.iloc[:1000]
+    store = CandleStore(str(tmp_path / 'store'))
+    # BTCUSDT : 3번째 캔들이 30분 밀려 1h 미만의 gap이 생긴 경우 (limit 0으로 다른 series까지 중단되면 안 됨)
+    shifted = chart.copy()
+    shifted.loc[3, 'Open time'] += HOUR // 2
+    store.write('BTCUSDT', '1h', shifted)
+    # ETHUSDT : 거래소에도 없는 구간(300~304)은 수정 후에도 gap으로 남음
+    store.write('ETHUSDT', '1h', chart.drop(index=range(300, 310)))
+    reports = repair_with_stub(store, {'BTCUSDT': {'1h': chart}, 'ETHUSDT': {'1h': chart.drop(index=range(300, 305))}})
+
+    assert reports['BTCUSDT']['refetched'] == 1
+    assert reports['BTCUSDT']['missing'] == 0 and reports['BTCUSDT']['misaligned'] == 1
+    assert reports['ETHUSDT']['refetched'] == 5 and reports['ETHUSDT']['missing'] == 5
+    open_time = chart['Open time'].to_numpy()
+    np.testing.assert_array_equal(reports['ETHUSDT']['gaps'], [[open_time[300], open_time[305]]])
+    assert_same_candles(store, 'ETHUSDT', chart.drop(index=range(300, 305)))
+
+
+def test_repair_without_crawler_raises(tmp_path, btc_chart):
+    store = CandleStore(str(tmp_path / 'store'))
+    store.write('BTCUSDT', '1h', btc_chart.iloc[:100].drop(index=50))
+    auditor = CandleAuditor(store)
+    with pytest.raises(ValueError, match='crawler'):
+        asyncio.run(auditor.run())
+    reports = asyncio.run(auditor.run(repair=False))
+    assert reports[0]['missing'] == 1
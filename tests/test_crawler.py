@@ -0,0 +1,140 @@
+import os
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import crawler as crawler_module
+from crawler import Crawler, RestClient, RequestError, INTERVAL_MS, split_windows
+from store import CANDLE_DTYPES, CandleStore
+from stub_server import StubKlineServer
+
+
+NUM_ROWS = 6000
+
+
+def run_with_stub(candles, scenario, max_retries=5, **crawler_kwargs):
+    # StubKlineServer + Crawler를 띄우고 scenario(server, crawler) 실행 후 정리
+    async def main():
+        server = StubKlineServer(candles)
+        await server.start()
+        client = RestClient(asyncio.get_running_loop(), max_weight_per_minute=10**7, max_retries=max_retries, backoff_base=0.001)
+        crawler = Crawler(client, **crawler_kwargs)
+        try:
+            return await scenario(server, crawler)
+        finally:
+            await client.close()
+            await server.stop()
+    return asyncio.run(main())
+
+
+def fetch_frame(server, crawler, chart, limit=500, overlap=0):
+    # chart 전체 구간을 limit개 캔들 window로 나눠 동시에 요청 (overlap : 이웃 window와 겹치는 캔들 수)
+    startTime = int(chart['Open time'].iloc[0])
+    endTime = int(chart['Open time'].iloc[-1]) + INTERVAL_MS['1h']
+    windows = split_windows(startTime, endTime, '1h', limit)
+    windows = [(max(windowStart - overlap * INTERVAL_MS['1h'], startTime), windowEnd) for windowStart, windowEnd in windows]
+    return crawler.get_coin_candle_windows(server.url, 'BTCUSDT', '1h', windows, limit + overlap)
+
+
+def assert_same_candles(df, chart):
+    expected = chart.astype(CANDLE_DTYPES).reset_index(drop=True)
+    pd.testing.assert_frame_equal(df.reset_index(drop=True), expected)
+
+
+@pytest.mark.parametrize('overlap', [0, 100])
+def test_windows_reassembled_in_order(btc_chart, overlap):
+    chart = btc_chart.iloc[:NUM_ROWS]
+
+    async def scenario(server, crawler):
+        df = await fetch_frame(server, crawler, chart, overlap=overlap)
+        assert server.num_requests >= NUM_ROWS // 500
+        return df
+
+    # 응답 순서와 관계없이 Open time 순 정렬, 겹친 window의 캔들은 한 번만 포함
+    df = run_with_stub({'BTCUSDT': {'1h': chart}}, scenario, max_concurrency=8)
+    assert_same_candles(df, chart)
+
+
+@pytest.mark.parametrize('status, retry_after', [(503, None), (429, 1), (500, None)])
+def test_retryable_failures_give_same_frame(btc_chart, status, retry_after):
+    chart = btc_chart.iloc[:NUM_ROWS]
+
+    async def scenario(server, crawler):
+        server.inject_failures(status, count=3, retry_after=retry_after)
+        df = await fetch_frame(server, crawler, chart)
+        assert not server.failures
+        return df
+
+    assert_same_candles(run_with_stub({'BTCUSDT': {'1h': chart}}, scenario), chart)
+
+
+def test_retries_exhausted_raise_request_error(btc_chart):
+    chart = btc_chart.iloc[:NUM_ROWS]
+
+    async def scenario(server, crawler):
+        server.inject_failures(503, count=10)
+        with pytest.raises(RequestError) as error:
+            await fetch_frame(server, crawler, chart, limit=1500)
+        return error.value
+
+    assert run_with_stub({'BTCUSDT': {'1h': chart}}, scenario, max_retries=2, max_concurrency=1).status == 503
+
+
+def test_client_error_is_not_retried(btc_chart):
+    async def scenario(server, crawler):
+        with pytest.raises(RequestError) as error:
+            await crawler.get_coin_candle_raw(server.url, 'UNKNOWN', '1h', 0, 500)
+        assert server.num_requests == 1
+        return error.value
+
+    assert run_with_stub({'BTCUSDT': {'1h': btc_chart.iloc[:10]}}, scenario).status == 400
+
+
+def test_incremental_resumes_after_partial_append(btc_chart, tmp_path, monkeypatch):
+    chart = btc_chart.iloc[:NUM_ROWS]
+    store = CandleStore(str(tmp_path / 'store'))
+    csv_path = str(tmp_path / 'btc_1h.csv')
+    store.write('BTCUSDT', '1h', chart.iloc[:2000])
+    chart.iloc[:2000].to_csv(csv_path, index=False)
+    append_candles = crawler_module.append_candles
+
+    def crash_mid_row(df, path):
+        # 첫 append가 행 중간까지만 쓰고 중단된 상황
+        with open(path, 'a') as f:
+            f.write(df.to_csv(header=False, index=False)[:777])
+        raise KeyboardInterrupt
+
+    async def scenario(server, crawler):
+        monkeypatch.setattr(crawler_module, 'append_candles', crash_mid_row)
+        with pytest.raises(KeyboardInterrupt):
+            await crawler.get_coin_candle_all(server.url, 'BTCUSDT', '1h', '2018-01-01', save=True, save_path=csv_path,
+                                              endTime='2030-01-01', incremental=True)
+        monkeypatch.setattr(crawler_module, 'append_candles', append_candles)
+        return await crawler.get_coin_candle_all(server.url, 'BTCUSDT', '1h', '2018-01-01', save=True, save_path=csv_path,
+                                                 endTime='2030-01-01', incremental=True)
+
+    run_with_stub({'BTCUSDT': {'1h': chart}}, scenario, store=store)
+    # 잘린 행은 checkpoint 지점으로 되돌려지고, 저장소/CSV 모두 끝까지 수집됨
+    assert_same_candles(pd.read_csv(csv_path, dtype=CANDLE_DTYPES), chart)
+    assert_same_candles(store.load('BTCUSDT', '1h').to_frame(), chart)
+    assert not os.path.exists(f'{csv_path}.ckpt')
+
+
+def test_incremental_without_save_leaves_files(btc_chart, tmp_path):
+    chart = btc_chart.iloc[:NUM_ROWS]
+    store = CandleStore(str(tmp_path / 'store'))
+    csv_path = str(tmp_path / 'btc_1h.csv')
+    store.write('BTCUSDT', '1h', chart.iloc[:2000])
+    chart.iloc[:2000].to_csv(csv_path, index=False)
+    csv_size = os.path.getsize(csv_path)
+
+    async def scenario(server, crawler):
+        return await crawler.get_coin_candle_all(server.url, 'BTCUSDT', '1h', '2018-01-01', save=False, save_path=csv_path,
+                                                 endTime='2030-01-01', incremental=True)
+
+    df = run_with_stub({'BTCUSDT': {'1h': chart}}, scenario, store=store)
+    assert_same_candles(df, chart.iloc[2000:])
+    assert_same_candles(store.load('BTCUSDT', '1h').to_frame(), chart.iloc[:2000])
+    assert os.path.getsize(csv_path) == csv_size and not os.path.exists(f'{csv_path}.ckpt')
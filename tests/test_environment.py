@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+
+from environment import Action, Environment, VectorEnvironment
+
+
+NUM_ENVS = 8
+NUM_STEPS = 3000
+
+
+def random_policies(rng, size):
+    # 일부 confidence를 nan으로 설정해 decide_trading_unit의 nan 경로도 확인
+    policies = rng.random((size, Environment.NUM_ACTIONS))
+    policies[rng.random(policies.shape) < 0.05] = np.nan
+    return policies
+
+
+@pytest.mark.parametrize('initial_balance', [10000, 1000])
+def test_vector_environment_matches_environment(btc_chart, initial_balance):
+    rng = np.random.default_rng(0)
+    chart = btc_chart.iloc[:NUM_STEPS + NUM_ENVS * 500]
+    training = chart.to_numpy(dtype=np.float32)
+    starts = np.arange(NUM_ENVS) * 500
+
+    envs = [Environment(chart, training, initial_balance, 70, 1000) for _ in range(NUM_ENVS)]
+    vector = VectorEnvironment(chart, training, initial_balance, 70, 1000, num_envs=NUM_ENVS)
+    for env, start in zip(envs, starts):
+        env.reset(start_idx=start)
+        env.step()
+    vector.reset(start_idx=starts)
+    vector.step()
+
+    for _ in range(NUM_STEPS):
+        actions = rng.integers(0, Environment.NUM_ACTIONS, size=NUM_ENVS)
+        policies = random_policies(rng, NUM_ENVS)
+        _, balance_state, reward, done, trading_unit = vector.step(actions, policies)
+        for i, env in enumerate(envs):
+            _, env_balance_state, env_reward, env_done, env_trading_unit = env.step(actions[i], policies[i])
+            np.testing.assert_array_equal(balance_state[i], np.asarray(env_balance_state, dtype=np.float64))
+            assert reward[i] == env_reward
+            assert done[i] == env_done
+            assert trading_unit[i] == env_trading_unit
+
+
+def step_hold(env, predicate=None, n_steps=None):
+    # step_until과 같은 조건으로 멈추는 bar 단위 HOLD 진행
+    num_steps = 0
+    while True:
+        result = env.step(Action.HOLD, Environment.HOLD_POLICY)
+        num_steps += 1
+        if result[3] or env.idx + 1 >= env.end_idx or (n_steps is not None and num_steps >= n_steps):
+            return result
+        if predicate is not None and predicate(np.array([env.idx]), np.array([env.profitloss]))[0]:
+            return result
+
+
+def assert_same_step(result, expected):
+    chart_state, balance_state, reward, done, trading_unit = result
+    np.testing.assert_array_equal(chart_state, expected[0])
+    assert balance_state == expected[1]
+    assert (reward, done, trading_unit) == expected[2:]
+
+
+@pytest.mark.parametrize('stop', ['n_steps', 'predicate', 'end'])
+def test_step_until_matches_hold_steps(btc_chart, stop):
+    rng = np.random.default_rng(1)
+    training = btc_chart.to_numpy(dtype=np.float32)
+    envs = [Environment(btc_chart, training, 10000, 70, 1000) for _ in range(2)]
+    for env in envs:
+        env.reset(start_idx=1000, length=5000)
+        env.step()
+
+    predicate = (lambda indices, profitloss: indices % 97 == 0) if stop == 'predicate' else None
+    while True:
+        action, policy = int(rng.integers(0, Environment.NUM_ACTIONS)), rng.random(Environment.NUM_ACTIONS)
+        results = [env.step(action, policy) for env in envs]
+        assert_same_step(results[0], results[1])
+        if results[0][3]:
+            break
+        n_steps = int(rng.integers(1, 300)) if stop == 'n_steps' else None
+        result = envs[0].step_until(predicate, n_steps)
+        assert_same_step(result, step_hold(envs[1], predicate, n_steps))
+        assert envs[0].snapshot()[:3] == envs[1].snapshot()[:3]
+        assert envs[0].snapshot()[4:] == envs[1].snapshot()[4:]
+        if result[3]:
+            break
+
+
+def test_step_until_stops_at_stop_out():
+    # 숏 포지션에서 가격이 계속 올라 -80% 손실이 나는 bar에서 멈추는지 확인
+    close = np.concatenate([np.full(10, 100.0), np.linspace(100, 2000, 4990)])
+    chart = np.column_stack([np.zeros_like(close), close, close, close, close, np.ones_like(close)])
+    envs = [Environment(chart, chart.astype(np.float32), 1000, 70, 1000) for _ in range(2)]
+    for env in envs:
+        env.step()
+        env.step(Action.SHORT, (1.0, 1.0, 1.0))
+
+    result = envs[0].step_until()
+    expected = step_hold(envs[1])
+    assert result[3] and expected[3]
+    assert_same_step(result, expected)
+    assert envs[0].idx == envs[1].idx and envs[0].num_hold == envs[1].num_hold
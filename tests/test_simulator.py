@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+import simulator
+from environment import Environment
+from simulator import simulate, NUMBA_AVAILABLE
+
+
+NUM_STEPS = 5000
+
+
+def replay_environment(chart, training, actions, policies, initial_balance):
+    # Environment.step으로 한 bar씩 재생한 (portfolio_value, profitloss, trading_unit, position) 배열
+    env = Environment(chart, training, initial_balance, 70, 1000)
+    env.step()
+    records = []
+    for action, policy in zip(actions, policies):
+        _, _, _, _, trading_unit = env.step(action, policy)
+        records.append((env.portfolio_value, env.profitloss, trading_unit, env.position))
+    portfolio_values, profitlosses, trading_units, positions = map(np.asarray, zip(*records))
+    return portfolio_values, profitlosses, trading_units, positions
+
+
+@pytest.mark.parametrize('python_kernel', [False, True] if NUMBA_AVAILABLE else [True])
+@pytest.mark.parametrize('initial_balance', [10000, 1000])
+def test_simulate_matches_environment(btc_chart, monkeypatch, python_kernel, initial_balance):
+    # python_kernel : numba 없이 실행되는 순수 Python 경로도 같은 결과인지 확인
+    if python_kernel and NUMBA_AVAILABLE:
+        monkeypatch.setattr(simulator, '_simulate', simulator._simulate.py_func)
+    rng = np.random.default_rng(0)
+    chart = btc_chart.iloc[:NUM_STEPS + 1]
+    training = chart.to_numpy(dtype=np.float32)
+    actions = rng.integers(0, Environment.NUM_ACTIONS, size=NUM_STEPS)
+    policies = rng.random((NUM_STEPS, Environment.NUM_ACTIONS))
+    policies[rng.random(policies.shape) < 0.05] = np.nan
+    confidences = policies[np.arange(NUM_STEPS), actions]
+
+    expected = replay_environment(chart, training, actions, policies, initial_balance)
+    # actions[t]는 초기 관측(bar 0) 이후 bar t + 1에서 수행됨
+    result = simulate(chart['Close'].to_numpy()[1:], actions, confidences, initial_balance, 70, 1000)
+    for name, values, expected_values in zip(('portfolio_value', 'profitloss', 'trading_unit', 'position'), result, expected):
+        np.testing.assert_array_equal(values, expected_values, err_msg=name)
@@ -0,0 +1,62 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import store as store_module
+from store import CANDLE_DTYPES, CandleStore, column_filename
+
+
+def assert_same_candles(columns, chart):
+    pd.testing.assert_frame_equal(columns.to_frame(), chart.astype(CANDLE_DTYPES).reset_index(drop=True))
+
+
+def test_append_in_place(btc_chart, tmp_path):
+    store = CandleStore(str(tmp_path))
+    store.write('BTCUSDT', '1h', btc_chart.iloc[:1000])
+    npy_path = os.path.join(store.path('BTCUSDT', '1h'), column_filename('Close'))
+    inode = os.stat(npy_path).st_ino
+    for start in range(1000, 5000, 1000):
+        store.append('BTCUSDT', '1h', btc_chart.iloc[start:start + 1000])
+
+    # 기존 파일을 교체하지 않고 이어 씀
+    assert os.stat(npy_path).st_ino == inode
+    assert_same_candles(store.load('BTCUSDT', '1h'), btc_chart.iloc[:5000])
+    assert_same_candles(store.load('BTCUSDT', '1h', mmap=False), btc_chart.iloc[:5000])
+    assert store.last_close_time('BTCUSDT', '1h') == btc_chart['Close time'].iloc[4999]
+
+
+def test_interrupted_append_is_not_committed(btc_chart, tmp_path, monkeypatch):
+    store = CandleStore(str(tmp_path))
+    store.write('BTCUSDT', '1h', btc_chart.iloc[:1000])
+
+    # 모든 컬럼을 쓴 뒤 length commit 직전에 중단
+    def crash(path, num_rows):
+        raise KeyboardInterrupt
+    monkeypatch.setattr(store_module, 'write_length', crash)
+    try:
+        store.append('BTCUSDT', '1h', btc_chart.iloc[1000:3000])
+    except KeyboardInterrupt:
+        pass
+    monkeypatch.undo()
+
+    assert_same_candles(store.load('BTCUSDT', '1h'), btc_chart.iloc[:1000])
+    assert store.last_close_time('BTCUSDT', '1h') == btc_chart['Close time'].iloc[999]
+    # 다음 append는 commit되지 않은 행을 덮어씀
+    store.append('BTCUSDT', '1h', btc_chart.iloc[1000:1500])
+    assert_same_candles(store.load('BTCUSDT', '1h'), btc_chart.iloc[:1500])
+    assert os.path.getsize(os.path.join(store.path('BTCUSDT', '1h'), column_filename('Open time'))) == 128 + 1500 * 8
+
+
+def test_write_recovers_from_leftover_directories(btc_chart, tmp_path):
+    store = CandleStore(str(tmp_path))
+    store.write('BTCUSDT', '1h', btc_chart.iloc[:100])
+    # 중단된 write가 남긴 {interval}.tmp / {interval}.old
+    for suffix in ('.tmp', '.old'):
+        os.makedirs(store.path('BTCUSDT', '1h') + suffix)
+        np.save(os.path.join(store.path('BTCUSDT', '1h') + suffix, column_filename('Open time')), np.arange(3))
+
+    assert store.series() == [('BTCUSDT', '1h')]
+    store.write('BTCUSDT', '1h', btc_chart.iloc[:200])
+    assert_same_candles(store.load('BTCUSDT', '1h'), btc_chart.iloc[:200])
+    assert not os.path.exists(store.path('BTCUSDT', '1h') + '.old')
@@ -0,0 +1,109 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+
+from crawler import Crawler, RestClient
+from environment import Action
+from metrics import Metrics
+from stream import CandleRingBuffer, KlineStream, LiveEnvironment
+from stub_server import StubKlineServer
+
+
+NUM_ROWS = 3000
+NUM_PREFILLED = 1000
+
+
+def stream_candles(charts, configure):
+    # prefill 이후 캔들을 stub /stream으로 받아 buffer에 채우고 (buffers, metrics counters) 반환
+    async def main():
+        server = StubKlineServer({symbol: {'1h': chart} for symbol, chart in charts.items()})
+        await server.start()
+        server.stream_time = int(charts['BTCUSDT']['Open time'].iloc[NUM_PREFILLED])
+        configure(server)
+        metrics = Metrics()
+        client = RestClient(asyncio.get_running_loop(), max_weight_per_minute=10**9, max_retries=1, backoff_base=0.01, metrics=metrics)
+        buffers = {symbol: CandleRingBuffer(4096) for symbol in charts}
+        for symbol, chart in charts.items():
+            buffers[symbol].extend(chart.iloc[:NUM_PREFILLED])
+        stream = KlineStream(Crawler(client), buffers, '1h', url=server.stream_url, rest_url=server.url)
+        task = asyncio.create_task(stream.run())
+        try:
+            for symbol, chart in charts.items():
+                await asyncio.wait_for(buffers[symbol].wait(len(chart)), 30)
+        finally:
+            await stream.stop()
+            await task
+            await client.close()
+            await server.stop()
+        return buffers, stream, metrics.summary()['counters']
+    return asyncio.run(main())
+
+
+def assert_buffer_equals(buffer, chart):
+    assert buffer.total == len(chart)
+    tail = buffer.tail(len(chart))
+    for column in chart.columns:
+        np.testing.assert_array_equal(np.asarray(tail[column]), chart[column].to_numpy(), err_msg=column)
+
+
+def test_stream_backfills_gaps_and_drops_duplicates(btc_chart):
+    charts = {'BTCUSDT': btc_chart.iloc[:NUM_ROWS], 'ETHUSDT': btc_chart.iloc[:NUM_ROWS].copy()}
+
+    def configure(server):
+        # 끊긴 동안 지나간 캔들(skip > 0)은 REST backfill, 다시 보낸 캔들(skip < 0)은 중복으로 무시
+        server.inject_disconnect(after=300, skip=7)
+        server.inject_disconnect(after=200, skip=-3)
+        server.inject_disconnect(after=500, skip=40)
+
+    buffers, stream, counters = stream_candles(charts, configure)
+    for symbol, chart in charts.items():
+        assert_buffer_equals(buffers[symbol], chart)
+    assert stream.num_connections == 4
+    assert counters['stream.backfill_candles'] == 2 * (7 + 40)
+    assert counters['stream.duplicates'] == 2 * 3
+
+
+def test_stream_survives_failed_backfill(btc_chart):
+    charts = {'BTCUSDT': btc_chart.iloc[:NUM_ROWS]}
+
+    def configure(server):
+        # 첫 gap의 REST backfill이 재시도 후에도 실패 -> 재연결 후 다음 마감 캔들에서 다시 채움
+        # 재연결 후에도 캔들이 계속 도착하도록 재생 속도 제한 (실제 stream처럼 backfill 중에 남은 캔들을 모두 보내지 않음)
+        server.stream_delay = 0.001
+        server.inject_disconnect(after=300, skip=7)
+        server.inject_failures(500, count=2)
+
+    buffers, stream, counters = stream_candles(charts, configure)
+    assert_buffer_equals(buffers['BTCUSDT'], charts['BTCUSDT'])
+    assert counters['stream.reconnects'] >= 2
+
+
+def test_invalid_message_is_ignored(btc_chart):
+    async def main():
+        client = RestClient(asyncio.get_running_loop(), metrics=Metrics())
+        buffer = CandleRingBuffer(16)
+        stream = KlineStream(Crawler(client), {'BTCUSDT': buffer}, '1h')
+        await stream.on_message(b'{"result":null,"id":1}')
+        await stream.on_message(b'not json')
+        counters = client.metrics.summary()['counters']
+        await client.close()
+        return buffer.total, counters
+    total, counters = asyncio.run(main())
+    assert total == 0 and counters['stream.invalid_messages'] == 2
+
+
+def test_live_environment_waits_for_next_candle(btc_chart):
+    async def main():
+        buffer = CandleRingBuffer(64)
+        buffer.extend(btc_chart.iloc[:10])
+        env = LiveEnvironment(buffer, 10000, 70, 1000)
+        env.step()
+        # 새 캔들이 없으면 action을 수행하지 않고 episode도 끝나지 않음
+        assert env.step(Action.LONG, (1.0, 1.0, 1.0)) == (None, None, 0, False, None)
+        assert env.step_until() == (None, None, 0, False, None)
+        assert env.num_long == 0
+        buffer.append(tuple(btc_chart.iloc[10]))
+        _, _, _, done, trading_unit = env.step(Action.LONG, (1.0, 1.0, 1.0))
+        assert not done and trading_unit > 0 and env.num_long == 1
+    asyncio.run(main())